@@ -0,0 +1,39 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+from dotenv import load_dotenv
+
+_BOOTSTRAPPED = False
+
+
+def ensure_bootstrapped() -> None:
+    """Loads .env and configures stdout logging once per process."""
+    global _BOOTSTRAPPED
+    if _BOOTSTRAPPED:
+        return
+    _BOOTSTRAPPED = True
+
+    # Load environment variables from .env file
+    load_dotenv()
+
+    # Configure logging to stdout. Records are handed to a queue and written by
+    # a listener thread, so a slow stdout never blocks the event loop.
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(
+        logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    )
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+    # The queue side only renders the message; the stream side adds the prefix
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "INFO").upper(),
+        format='%(message)s',
+        handlers=[logging.handlers.QueueHandler(log_queue)]
+    )
@@ -1,37 +1,35 @@
+import functools
 import logging
-import sys
-from dotenv import load_dotenv
 from google.adk.agents import Agent
 
+from agent.backend._bootstrap import ensure_bootstrapped
+
 from agent.backend.tools.cart.tools import  add_item_to_cart, create_store_cart_and_get_checkout_url, remove_item_from_cart
 from agent.backend.tools.interface.tools import  create_cart_widget
 from agent.backend.agents.cart.prompt import PROMPT
+from agent.backend.agents.utils import gemini_model, static_instruction, trim_history
 
 
-# Configure logging to stdout
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
+ensure_bootstrapped()
 logger = logging.getLogger(__name__)
 
-# Load environment variables from .env file
-logger.info("Loading environment variables for agent")
-load_dotenv()
-logger.info("Environment variables loaded")
 
-logger.info("Creating cart-agent")
-cart_agent = Agent(
-            model="gemini-2.5-flash",
-            name="cart_agent",
-            description="A shopping cart management agent",
-            instruction=PROMPT,
-            tools=[
-                add_item_to_cart,
-                remove_item_from_cart,
-                create_store_cart_and_get_checkout_url,
-                create_cart_widget,
-            ]
-        )
-logger.info("cart-agent created successfully")
+@functools.cache
+def get_cart_agent() -> Agent:
+    """Builds the cart agent on first use."""
+    logger.info("Creating cart-agent")
+    cart_agent = Agent(
+        model=gemini_model(),
+        name="cart_agent",
+        description="A shopping cart management agent",
+        instruction=static_instruction(PROMPT),
+        before_model_callback=trim_history,
+        tools=[
+            add_item_to_cart,
+            remove_item_from_cart,
+            create_store_cart_and_get_checkout_url,
+            create_cart_widget,
+        ]
+    )
+    logger.info("cart-agent created successfully")
+    return cart_agent
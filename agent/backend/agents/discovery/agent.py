@@ -1,32 +1,30 @@
+import functools
 import logging
-import sys
-from dotenv import load_dotenv
 from google.adk.agents import Agent
+
+from agent.backend._bootstrap import ensure_bootstrapped
 from agent.backend.tools.product.tools import search_products
 from agent.backend.tools.interface.tools import create_products_widgets
 from agent.backend.agents.discovery.prompt import PROMPT
+from agent.backend.agents.utils import gemini_model, static_instruction, trim_history
 
 
-# Configure logging to stdout
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
+ensure_bootstrapped()
 logger = logging.getLogger(__name__)
 
-# Load environment variables from .env file
-logger.info("Loading environment variables for agent")
-load_dotenv()
-logger.info("Environment variables loaded")
 
-discovery_agent = Agent(
-    model="gemini-2.5-flash",
-    name="discovery_agent",
-    description="End-to-end fashion discovery agent combining product search and widget rendering.",
-    instruction=PROMPT,
-    tools=[
-        search_products,
-        create_products_widgets,
-    ],
-)
+@functools.cache
+def get_discovery_agent() -> Agent:
+    """Builds the discovery agent on first use."""
+    discovery_agent = Agent(
+        model=gemini_model(),
+        name="discovery_agent",
+        description="End-to-end fashion discovery agent combining product search and widget rendering.",
+        instruction=static_instruction(PROMPT),
+        before_model_callback=trim_history,
+        tools=[
+            search_products,
+            create_products_widgets,
+        ],
+    )
+    return discovery_agent
@@ -1,194 +1,436 @@
 import asyncio
-import json
+import functools
+import hashlib
 import logging
-import sys
-from dotenv import load_dotenv
+import os
+import weakref
+from typing import Any, AsyncIterator
+import cachetools
+import orjson
 from google.adk.agents import Agent
 
 from google.adk.artifacts.in_memory_artifact_service import InMemoryArtifactService
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
+from google.adk.sessions import DatabaseSessionService, InMemorySessionService
 from google.genai import types
+from pydantic import ValidationError
 
-from agent.backend.agents.product_details.agent import product_details_agent
-from agent.backend.agents.discovery.agent import discovery_agent
-from agent.backend.agents.cart.agent import cart_agent
-from agent.backend.agents.context.agent import context_agent
-from agent.backend.types.types import AgentCallRequest, AgentCallResponse, FunctionPayload
+from agent.backend._bootstrap import ensure_bootstrapped
+from agent.backend.types.types import FUNCTION_PAYLOAD_TYPES, AgentCallRequest, AgentCallResponse, AgentEvent, AgentEventType, FunctionPayload
 from agent.backend.agents.orchestrator.prompt import PROMPT
+from agent.backend.agents.utils import gemini_model, static_instruction, trim_history
 
-# Configure logging to stdout
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
+ensure_bootstrapped()
 logger = logging.getLogger(__name__)
 
-# Load environment variables from .env file
-logger.info("Loading environment variables for agent")
-load_dotenv()
-logger.info("Environment variables loaded")
-
-
-logger.info("Creating orchestrator-agent")
-ORCHESTRATOR_AGENT = Agent(
-            model="gemini-2.5-flash",
-            name="orchestrator_agent",
-            description="A shopping assistant agent",
-            instruction=PROMPT,
-            sub_agents=[
-                discovery_agent,
-                cart_agent,
-                context_agent,
-                product_details_agent,
-            ],
-        )
-logger.info("orchestrator-agent created successfully")
+
+@functools.cache
+def _build_orchestrator() -> Agent:
+    """Builds the orchestrator and its sub-agents on first use.
+
+    Sub-agent modules pull in their tools and storefront clients, so they are
+    imported here rather than when this module is loaded.
+    """
+    from agent.backend.agents.cart.agent import get_cart_agent
+    from agent.backend.agents.context.agent import get_context_agent
+    from agent.backend.agents.discovery.agent import get_discovery_agent
+    from agent.backend.agents.product_details.agent import get_product_details_agent
+
+    logger.info("Creating orchestrator-agent")
+    orchestrator_agent = Agent(
+        model=gemini_model(),
+        name="orchestrator_agent",
+        description="A shopping assistant agent",
+        instruction=static_instruction(PROMPT),
+        before_model_callback=trim_history,
+        sub_agents=[
+            get_discovery_agent(),
+            get_cart_agent(),
+            get_context_agent(),
+            get_product_details_agent(),
+        ],
+    )
+    logger.info("orchestrator-agent created successfully")
+    return orchestrator_agent
+
 
 APP_NAME = "semanticpay-shopping-assistant"
 logger.info(f"Initializing services for app: {APP_NAME}")
-SESSION_SERVICE = InMemorySessionService()
-logger.info("InMemorySessionService initialized")
+# Sessions live in a shared database when SESSION_DB_URL is set so every
+# worker sees the same conversation; otherwise they stay in process memory.
+SESSION_DB_URL = os.getenv("SESSION_DB_URL")
+if SESSION_DB_URL:
+    SESSION_SERVICE = DatabaseSessionService(db_url=SESSION_DB_URL)
+    logger.info("DatabaseSessionService initialized")
+else:
+    SESSION_SERVICE = InMemorySessionService()
+    logger.info("InMemorySessionService initialized")
 ARTIFACT_SERVICE = InMemoryArtifactService()
 logger.info("InMemoryArtifactService initialized")
 
-logger.info("Creating Runner instance")
-RUNNER = Runner(
-            app_name=APP_NAME,
-            agent=ORCHESTRATOR_AGENT,
-            artifact_service=ARTIFACT_SERVICE,
-            session_service=SESSION_SERVICE,
-        )
-logger.info("Runner created successfully")
+# In-memory sessions are dropped once idle for SESSION_TTL_SECONDS or when more
+# than SESSION_MAX_COUNT are live, so abandoned conversations don't pile up
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "3600"))
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", "10000"))
+_SESSION_DELETE_TASKS: set[asyncio.Task] = set()
+
+
+def _delete_session(session_id: str) -> None:
+    task = asyncio.get_running_loop().create_task(SESSION_SERVICE.delete_session(
+        app_name=APP_NAME, user_id=session_id, session_id=session_id,
+    ))
+    _SESSION_DELETE_TASKS.add(task)
+    task.add_done_callback(_SESSION_DELETE_TASKS.discard)
+
+
+class _SessionTracker(cachetools.TTLCache):
+    """Tracks recently used sessions, deleting them from the service on eviction.
+
+    A session whose turn is running or waiting (it holds an entry in
+    _SESSION_LOCKS) is only dropped from the tracker, never deleted; the turn
+    re-inserts it when it finishes.
+    """
+
+    def popitem(self):
+        key, value = super().popitem()
+        if key not in _SESSION_LOCKS:
+            logger.info("Evicting least recently used session %s", key)
+            _delete_session(key)
+        return key, value
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        for key, _ in expired:
+            if key not in _SESSION_LOCKS:
+                logger.info("Expiring idle session %s", key)
+                _delete_session(key)
+        return expired
+
+
+# Only process-local sessions are evicted; a shared database is left to its
+# own retention since other workers may still be serving those sessions
+_ACTIVE_SESSIONS: _SessionTracker | None = (
+    None if SESSION_DB_URL else _SessionTracker(maxsize=SESSION_MAX_COUNT, ttl=SESSION_TTL_SECONDS)
+)
+
+# Caps concurrent agent turns so bursts queue here instead of piling onto Gemini
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+_GEMINI_SEM = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
 
-user_id_to_session_id = {}
+_RUNNER: Runner | None = None
+_RUNNER_LOCK = asyncio.Lock()
+
+
+async def get_runner() -> Runner:
+    """Returns the process-wide Runner, creating it on first use."""
+    global _RUNNER
+    if _RUNNER is None:
+        async with _RUNNER_LOCK:
+            if _RUNNER is None:
+                # Built on a worker thread so the event loop keeps serving meanwhile
+                orchestrator_agent = await asyncio.to_thread(_build_orchestrator)
+                logger.info("Creating Runner instance")
+                _RUNNER = Runner(
+                    app_name=APP_NAME,
+                    agent=orchestrator_agent,
+                    artifact_service=ARTIFACT_SERVICE,
+                    session_service=SESSION_SERVICE,
+                )
+                logger.info("Runner created successfully")
+    return _RUNNER
+
+
+_WARMUP_TASK: asyncio.Task | None = None
+
+
+async def connect() -> None:
+    """Starts building the shared Runner without holding up server startup."""
+    global _WARMUP_TASK
+    if _WARMUP_TASK is None:
+        _WARMUP_TASK = asyncio.create_task(get_runner())
+
+
+async def disconnect() -> None:
+    """Closes the shared Runner and releases the toolsets it holds."""
+    global _RUNNER, _WARMUP_TASK
+    if _WARMUP_TASK is not None:
+        # Let an in-flight build finish so the runner it creates is closed below
+        await asyncio.gather(_WARMUP_TASK, return_exceptions=True)
+        _WARMUP_TASK = None
+    if _RUNNER is None:
+        return
+    logger.info("Closing Runner")
+    await _RUNNER.close()
+    _RUNNER = None
+    logger.info("Runner closed")
+
+
+async def _run_limited(runner: Runner, **kwargs: Any) -> AsyncIterator[Any]:
+    """Streams runner events while holding one of the GEMINI_MAX_CONCURRENCY slots."""
+    async with _GEMINI_SEM:
+        async for event in runner.run_async(**kwargs):
+            yield event
+
+
+# Events buffered ahead of call_agent's processing before the runner is paused
+EVENT_BUFFER_SIZE = 16
+_END_OF_EVENTS = object()
+
+
+async def _buffered(events: AsyncIterator[Any], maxsize: int = EVENT_BUFFER_SIZE) -> AsyncIterator[Any]:
+    """Pulls events on a separate task so receiving overlaps with processing.
+
+    The queue is bounded: when the consumer falls behind, the producer waits,
+    which in turn pauses the runner.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    async def drain() -> None:
+        try:
+            async for event in events:
+                await queue.put(event)
+        except Exception as e:
+            await queue.put(e)
+        await queue.put(_END_OF_EVENTS)
+
+    producer = asyncio.create_task(drain())
+    try:
+        while (item := await queue.get()) is not _END_OF_EVENTS:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        producer.cancel()
+
+
+# One lock per session with a turn running or waiting; an entry disappears
+# once no turn references its lock, so the registry never needs sweeping
+_SESSION_LOCKS: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def _session_lock(session_id: str) -> asyncio.Lock:
+    """Serializes turns of one session, which would otherwise interleave their
+    reads and appends of the session's events and state."""
+    lock = _SESSION_LOCKS.get(session_id)
+    if lock is None:
+        lock = _SESSION_LOCKS[session_id] = asyncio.Lock()
+    return lock
+
+
+async def call_agent(req: AgentCallRequest) -> AsyncIterator[AgentEvent]:
+    """Executes one turn of the shopping agent, yielding text and tool payloads as they arrive.
+
+    Turns of the same session run one at a time, in arrival order.
+    """
+    async with _session_lock(req.session_id or ""):
+        # A streamed turn moves the conversation on, so a cached /query
+        # answer for this session must not be replayed afterwards
+        _RESPONSE_CACHE.pop(req.session_id, None)
+        async for event in _call_agent(req):
+            yield event
+
+
+async def _call_agent(req: AgentCallRequest) -> AsyncIterator[AgentEvent]:
+    logger.debug("call_agent invoked for session %s", req.session_id)
 
-async def call_agent(req: AgentCallRequest) -> AgentCallResponse:
-    """Executes one turn of the shopping agent with a query and full chat context."""
-    logger.info("="*60)
-    logger.info("call_agent function invoked")
-    logger.info(f"Question: {req.question}")
-    logger.info(f"Session ID: {req.session_id}")
-    
     try:
         assert req.session_id, "Session ID must be provided"
 
         user_id = req.session_id
-        logger.info(f"User ID: {user_id}")
 
-        if user_id_to_session_id.get(user_id):
-            session_id = user_id_to_session_id[user_id]
-            session = await SESSION_SERVICE.get_session(
-                app_name=APP_NAME, session_id=session_id, user_id=user_id,
-
-            )
-            if session is None:
-                raise ValueError(f"Session with ID {session_id} not found for user {user_id}")
-            logger.info(f"Session found with ID: {session_id}")
+        # The ADK session shares the caller's id, so any worker can find it
+        # in the session service without a process-local index
+        session_id = user_id
+        # Refreshed before the lookup so a stale entry of this session cannot
+        # expire, and be deleted, after the session has been loaded
+        if _ACTIVE_SESSIONS is not None:
+            _ACTIVE_SESSIONS[session_id] = True
+        session = await SESSION_SERVICE.get_session(
+            app_name=APP_NAME, session_id=session_id, user_id=user_id,
+        )
+        if session is not None:
+            logger.debug("Session found with ID: %s", session_id)
         else:
-            logger.info("Creating session")
             session = await SESSION_SERVICE.create_session(
-                state={}, app_name=APP_NAME, user_id=user_id
+                state={}, app_name=APP_NAME, user_id=user_id, session_id=session_id,
             )
-            session_id = session.id
-            user_id_to_session_id[user_id] = session_id
-            logger.info(f"Session created with ID: {session_id}")
-
-        query = f"[user]: {req.question}"
-        logger.info(f"[user]: {req.question}")
-
-        # print("SESSION STATE: ===================================")
-        # print(session)
-        # print("===================================")
-        
-        logger.info("Creating content object for agent")
-        content = types.Content(role="user", parts=[types.Part(text=query)])
-        logger.info("Content object created")
-
-        logger.info("Starting async runner execution")
-        events_async = RUNNER.run_async(
-            session_id=session.id, user_id=user_id, new_message=content
+            logger.debug("Session created with ID: %s", session_id)
+
+        logger.debug("[user]: %s", req.question)
+
+        # Summarise rather than repr the session: the full event history is large
+        # and log records are rendered on the event loop before being queued
+        logger.debug(
+            "Session %s: %d event(s), state keys %s",
+            session.id, len(session.events), list(session.state),
         )
-        logger.info("Runner started, processing events stream")
 
-        full_response = ""
-        func_payloads = []
+        logger.debug("Creating content object for agent")
+        # role="user" already marks the speaker, so the question is sent as-is
+        content = types.Content(role="user", parts=[types.Part(text=req.question)])
+        logger.debug("Content object created")
+
+        logger.debug("Starting async runner execution")
+        runner = await get_runner()
+        events_async = _buffered(_run_limited(
+            runner, session_id=session.id, user_id=user_id, new_message=content
+        ))
+        logger.debug("Runner started, processing events stream")
+
         event_count = 0
 
-        logger.info("Beginning event stream processing")
+        logger.debug("Beginning event stream processing")
         async for event in events_async:
             event_count += 1
-            logger.debug(f"Processing event {event_count}")
+            logger.debug("Processing event %d", event_count)
             if not event.content or not event.content.parts:
                 logger.debug("Skipping event with no content or parts")
                 continue
 
             author = event.author
-            logger.debug(f"Event from author: {author}")
+            logger.debug("Event from author: %s", author)
 
             logger.debug("Extracting function calls and responses from event")
-            function_calls = [
-                e.function_call for e in event.content.parts if e.function_call
-            ]
-            function_responses = [
-                e.function_response for e in event.content.parts if e.function_response
-            ]
-            logger.debug(f"Found {len(function_calls)} function call(s) and {len(function_responses)} function response(s)")
-
-            if event.content.parts[0].text:
-                text_response = event.content.parts[0].text
-                logger.info(f"[{author}]: {text_response}")
-                full_response += text_response
+            function_calls = []
+            function_responses = []
+            parts = event.content.parts
+            # A part carries exactly one kind of payload, so dispatch once per part
+            for part in parts:
+                if part.function_call:
+                    function_calls.append(part.function_call)
+                elif part.function_response:
+                    function_responses.append(part.function_response)
+                elif part.text:
+                    # Every text part is kept; an event can carry several
+                    logger.debug("[%s]: %s", author, part.text)
+                    yield AgentEvent(type=AgentEventType.TEXT, text=part.text)
+            logger.debug("Found %d function call(s) and %d function response(s)", len(function_calls), len(function_responses))
 
             for func_call in function_calls:
-                logger.info(f"FUNC CALLS: [{author}]: {func_call.name}({json.dumps(func_call.args)})")
+                # Serializing large tool args is skipped entirely unless DEBUG is on
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        "FUNC CALLS: [%s]: %s(%s)",
+                        author, func_call.name, orjson.dumps(func_call.args).decode(),
+                    )
+                yield AgentEvent(type=AgentEventType.FUNCTION_CALL, function_name=func_call.name)
                 
             for func_resp in function_responses:
-                func_payload = None
-
                 if func_resp.response is None:
-                    logger.warning(f"Empty function response for {func_resp.name}")
+                    logger.warning("Empty function response for %s", func_resp.name)
                     continue
 
-                logger.info(f"Processing function response for {func_resp.name} - {func_resp.response}")
-                # try:
-                #     func_payload = json.loads(func_resp.response["result"].content[0].text)
-                #     logger.info(f"FUNC RESPONSE: [{author}]: {func_resp.name} -> {json.dumps(func_payload, indent=2)}")
-                # except Exception as e:
-                #     logger.error(f"Error parsing function response JSON: {str(e)}")
-                try:
-                    func_payload = func_resp.response["result"]
-                    logger.info(f"FUNC RESPONSE: [{author}]: {func_resp.name} -> {func_payload}")
-                except Exception as e:
-                    logger.error(f"Error parsing function response JSON: {str(e)}")
+                # Tools run in process, so the result is the object the tool returned
+                func_payload = func_resp.response.get("result")
+                logger.debug("FUNC RESPONSE: [%s]: %s -> %s", author, func_resp.name, func_payload)
 
                 if func_payload:
-                    func_payloads.append(FunctionPayload(
-                        name=func_resp.name or "UNKNOWN",
-                        payload=func_payload,
-                    ))
-                    logger.info(f"Added function payload for {func_resp.name}")
-        
-        logger.info(f"Event stream processing complete. Processed {event_count} events")
-        logger.info(f"Collected {len(func_payloads)} function payload(s)")
-        logger.info(f"Full response length: {len(full_response)} characters")
-        logger.info(f"Final response: {full_response}")
-        
-        logger.info("Creating AgentCallResponse")
-        response = AgentCallResponse(
-            answer=full_response,
-            function_payloads=func_payloads,
-        )
-        logger.info("call_agent execution completed successfully")
-        logger.info("="*60)
-        
-        return response
+                    name = func_resp.name or "UNKNOWN"
+                    payload_type = FUNCTION_PAYLOAD_TYPES.get(name, FunctionPayload)
+                    try:
+                        function_payload = payload_type(name=name, payload=func_payload)
+                    except ValidationError as e:
+                        # A malformed result must not abort the turn; pass it on untyped
+                        logger.error("Invalid payload from %s: %s", name, e)
+                        function_payload = FunctionPayload(name=name, payload=func_payload)
+                    yield AgentEvent(
+                        type=AgentEventType.FUNCTION_PAYLOAD,
+                        function_payload=function_payload,
+                    )
+                    logger.debug("Yielded function payload for %s", func_resp.name)
+
+            if function_responses:
+                # Wrapping tool payloads is CPU work; let other sessions run before the next event
+                await asyncio.sleep(0)
+
+        logger.debug("Event stream processing complete. Processed %d events", event_count)
     except Exception as e:
         logger.error(f"Error in call_agent: {str(e)}", exc_info=True)
         raise
+    finally:
+        # Idle time counts from the end of the turn; this also restores an
+        # entry evicted while the turn was running
+        if _ACTIVE_SESSIONS is not None and req.session_id:
+            _ACTIVE_SESSIONS[req.session_id] = True
+
+
+# Last answer per session, replayed when the same question arrives again right
+# away (double submits, page refreshes) instead of re-running the agent
+_RESPONSE_CACHE: cachetools.TTLCache = cachetools.TTLCache(maxsize=2048, ttl=120)
+# Turns that called any of these tools changed the cart and are never replayed;
+# add/remove return nothing, so this goes by function call, not by payload
+_CART_MUTATING_TOOLS = frozenset({
+    "add_item_to_cart",
+    "remove_item_from_cart",
+    "create_store_cart_and_get_checkout_url",
+    "create_cart_widget",
+})
+
+
+def _question_digest(question: str) -> bytes:
+    return hashlib.blake2b(question.strip().lower().encode(), digest_size=16).digest()
+
+
+async def call_agent_collect(req: AgentCallRequest) -> AgentCallResponse:
+    """Runs call_agent to completion and gathers its events into one response."""
+    # The cache check shares the turn's lock, so a double submit waits for
+    # the first answer and replays it instead of running the agent twice
+    async with _session_lock(req.session_id or ""):
+        return await _call_agent_collect(req)
+
+
+async def _call_agent_collect(req: AgentCallRequest) -> AgentCallResponse:
+    digest = _question_digest(req.question)
+    cached = _RESPONSE_CACHE.get(req.session_id)
+    if cached is not None and cached[0] == digest:
+        logger.debug("Replaying cached response for repeated question in session %s", req.session_id)
+        return cached[1]
+
+    response_parts: list[str] = []
+    func_payloads: list[FunctionPayload] = []
+    mutated_cart = False
+    async for event in _call_agent(req):
+        if event.type == AgentEventType.TEXT and event.text:
+            response_parts.append(event.text)
+        elif event.type == AgentEventType.FUNCTION_CALL:
+            mutated_cart = mutated_cart or event.function_name in _CART_MUTATING_TOOLS
+        elif event.type == AgentEventType.FUNCTION_PAYLOAD and event.function_payload:
+            func_payloads.append(event.function_payload)
+
+    full_response = "".join(response_parts)
+    logger.debug("Collected %d function payload(s), %d response character(s)", len(func_payloads), len(full_response))
+    logger.debug("Final response: %s", full_response)
+
+    response = AgentCallResponse(
+        answer=full_response,
+        function_payloads=func_payloads,
+    )
+    if req.session_id:
+        if full_response and not mutated_cart:
+            _RESPONSE_CACHE[req.session_id] = (digest, response)
+        else:
+            _RESPONSE_CACHE.pop(req.session_id, None)
+    return response
+
+
+async def call_agent_batch(
+    reqs: list[AgentCallRequest],
+) -> list[AgentCallResponse | BaseException]:
+    """Runs independent agent turns concurrently, e.g. for offline evaluation.
+
+    Fan-out is bounded by GEMINI_MAX_CONCURRENCY. Each request should use its
+    own session id; a failed turn is returned as its exception, in order.
+    """
+    logger.info("call_agent_batch invoked with %d request(s)", len(reqs))
+    results = await asyncio.gather(
+        *(call_agent_collect(req) for req in reqs), return_exceptions=True
+    )
+    failed = sum(isinstance(res, BaseException) for res in results)
+    if failed:
+        logger.warning("%d of %d batched request(s) failed", failed, len(reqs))
+    return list(results)
 
 
 if __name__ == "__main__":
     logger.info("Running agent in standalone mode")
-    asyncio.run(call_agent(AgentCallRequest(question="i'm looking for a bag")))
+    asyncio.run(call_agent_collect(AgentCallRequest(question="i'm looking for a bag")))
@@ -1,33 +1,31 @@
+import functools
 import logging
-import sys
-from dotenv import load_dotenv
 from google.adk.agents import Agent
 
+from agent.backend._bootstrap import ensure_bootstrapped
+
 from agent.backend.agents.product_details.prompt import PROMPT
+from agent.backend.agents.utils import gemini_model, static_instruction, trim_history
 from agent.backend.tools.product.tools import get_product_details
 
 
-# Configure logging to stdout
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
+ensure_bootstrapped()
 logger = logging.getLogger(__name__)
 
-# Load environment variables from .env file
-logger.info("Loading environment variables for agent")
-load_dotenv()
-logger.info("Environment variables loaded")
 
-logger.info("Creating product_details-agent")
-product_details_agent = Agent(
-            model="gemini-2.5-flash",
-            name="product_details_agent",
-            description="A product_details information retrieval agent",
-            instruction=PROMPT,
-            tools=[
-                get_product_details,
-            ]
-        )
-logger.info("product_details-agent created successfully")
+@functools.cache
+def get_product_details_agent() -> Agent:
+    """Builds the product details agent on first use."""
+    logger.info("Creating product_details-agent")
+    product_details_agent = Agent(
+        model=gemini_model(),
+        name="product_details_agent",
+        description="A product_details information retrieval agent",
+        instruction=static_instruction(PROMPT),
+        before_model_callback=trim_history,
+        tools=[
+            get_product_details,
+        ]
+    )
+    logger.info("product_details-agent created successfully")
+    return product_details_agent
@@ -0,0 +1,86 @@
+import functools
+import os
+import re
+import sys
+import textwrap
+from typing import Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.llm_agent import InstructionProvider
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.models import Gemini, LlmRequest, LlmResponse
+from google.genai import types
+
+# Upper bound on the conversation contents sent to the model per LLM call
+MAX_HISTORY_CONTENTS = 24
+
+MODEL_NAME = "gemini-2.5-flash"
+
+
+@functools.cache
+def gemini_model() -> Gemini:
+    """Returns the Gemini model shared by every agent.
+
+    Rate-limited (429) and transient server errors are retried by the genai
+    client with exponential backoff and jitter instead of failing the turn.
+    """
+    return Gemini(
+        model=MODEL_NAME,
+        retry_options=types.HttpRetryOptions(
+            attempts=int(os.getenv("GEMINI_RETRY_ATTEMPTS", "4")),
+            initial_delay=1.0,
+            max_delay=16.0,
+            http_status_codes=[429, 500, 502, 503, 504],
+        ),
+    )
+
+
+def static_instruction(prompt: str) -> InstructionProvider:
+    """Binds a fixed prompt to an agent.
+
+    ADK runs session-state templating over plain string instructions on every
+    LLM call; a provider is used verbatim, so the prompt is prepared once here:
+    dedented, stripped and with blank-line runs collapsed before interning.
+    """
+    prompt = re.sub(r"\n{3,}", "\n\n", textwrap.dedent(prompt).strip())
+    prompt = sys.intern(prompt)
+
+    def provider(_ctx: ReadonlyContext) -> str:
+        return prompt
+
+    return provider
+
+
+def trim_history(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """Keeps only the most recent MAX_HISTORY_CONTENTS contents in the request.
+
+    The window always starts on a user message so that no function response is
+    sent without the function call that produced it. When a long tool chain
+    leaves no user message in the window, it is widened back to the nearest
+    one; with no user message at all the contents are sent untrimmed.
+    """
+    contents = llm_request.contents
+    if len(contents) <= MAX_HISTORY_CONTENTS:
+        return None
+
+    window_start = len(contents) - MAX_HISTORY_CONTENTS
+    start = next(
+        (i for i in range(window_start, len(contents)) if _is_user_message(contents[i])),
+        None,
+    )
+    if start is None:
+        start = next(
+            (i for i in range(window_start - 1, -1, -1) if _is_user_message(contents[i])),
+            0,
+        )
+    if start > 0:
+        llm_request.contents = contents[start:]
+    return None
+
+
+def _is_user_message(content: types.Content) -> bool:
+    return content.role == "user" and not any(
+        part.function_response for part in content.parts or []
+    )
@@ -1,5 +1,8 @@
+import sys
 from enum import Enum
-from pydantic import BaseModel, ConfigDict, Field
+from operator import itemgetter
+from typing import Any
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_validator, model_validator
 
 
 class StoreProvider(Enum):
@@ -7,30 +10,86 @@ class StoreProvider(Enum):
 
 
 class Price(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     amount: float
     currency_code: str = Field(alias="currencyCode")
 
+    @field_validator("currency_code")
+    @classmethod
+    def _intern_currency_code(cls, v: str) -> str:
+        # A page of products repeats the same few codes; share one string each
+        return sys.intern(v)
+
 
 class PriceRange(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     min_variant_price: Price = Field(alias="minVariantPrice")
     max_variant_price: Price = Field(alias="maxVariantPrice")
 
 
 class ProductVariant(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: str
     title: str
     price: Price
 
+    @field_validator("price", mode="before")
+    @classmethod
+    def _price_from_amount(cls, v: Any) -> Any:
+        # The Admin API returns a bare amount string without a currency
+        return {"amount": v, "currencyCode": "USD"} if isinstance(v, str) else v
+
+
+_get_url = itemgetter("url")
+
 
 class Product(BaseModel):
+    model_config = ConfigDict(extra="ignore", populate_by_name=True, frozen=True)
+
     id: str
     title: str
-    description: str
+    # Defaults cover fields left out by a request's projection mask
+    description: str = ""
     online_store_url: str = Field(default="", alias="onlineStoreUrl")
-    images: list[str]
+    images: list[str] = []
     price: Price
     price_range: PriceRange | None = Field(default=None, alias="priceRange")
-    variants: list[ProductVariant]
+    variants: list[ProductVariant] = []
+
+    @model_validator(mode="before")
+    @classmethod
+    def _from_graphql_node(cls, data: Any) -> Any:
+        # Lets the clients validate raw Shopify nodes as-is: unwraps the
+        # images/variants connections ({"nodes": [...]}) and fills in price
+        if not isinstance(data, dict):
+            return data
+        # Shallow copy, so the caller's raw response is left untouched
+        data = dict(data)
+        images = data.get("images")
+        if isinstance(images, dict):
+            data["images"] = list(map(_get_url, images.get("nodes", ())))
+        variants = data.get("variants")
+        if isinstance(variants, dict):
+            data["variants"] = variants = variants.get("nodes", [])
+        if data.get("onlineStoreUrl", "") is None:
+            data["onlineStoreUrl"] = ""
+        if "price" not in data:
+            if data.get("priceRange"):
+                data["price"] = data["priceRange"]["minVariantPrice"]
+            elif variants:
+                data["price"] = variants[0]["price"]
+        # Single-variant products carry just the one price; when a field
+        # projection left variants out, the range is kept as fetched
+        if isinstance(variants, list) and len(variants) <= 1:
+            data.pop("priceRange", None)
+        return data
+
+
+# Validates a whole page of raw product nodes in a single pydantic-core call
+PRODUCT_LIST_ADAPTER = TypeAdapter(list[Product])
 
 
 class SortKey(Enum):
@@ -44,6 +103,10 @@ class CartLineInput(BaseModel):
     merchandise_id: str = Field(alias="merchandiseId")
 
 
+# Serializes a cart's lines to mutation input in a single pydantic-core call
+CART_LINES_ADAPTER = TypeAdapter(list[CartLineInput])
+
+
 class UserError(BaseModel):
     field: list[str] | None = None
     message: str
@@ -71,15 +134,29 @@ class Cart(BaseModel):
 # ============================================================================
 
 
+# Largest page a single search may ask for (Shopify's connection limit)
+MAX_SEARCH_FIRST = 250
+
+
 class SearchProductsRequest(BaseModel):
+    # Frozen so requests are hashable and can key caches without serializing
+    model_config = ConfigDict(frozen=True)
+
     query: str = ""
-    first: int = 10
+    first: int = Field(default=10, ge=1, le=MAX_SEARCH_FIRST)
+    # Opaque cursor from a previous response's end_cursor
+    after: str | None = None
     sort_key: str = SortKey.RELEVANCE.value
     reverse: bool = False
+    # Optional Product fields to fetch (description, online_store_url, images,
+    # variants); None fetches everything
+    fields: frozenset[str] | None = None
 
 
 class SearchProductsResponse(BaseModel):
     products: list[Product]
+    # Cursor for the next page, or None when this was the last one
+    end_cursor: str | None = None
 
 
 # ============================================================================
@@ -88,11 +165,24 @@ class SearchProductsResponse(BaseModel):
 
 
 class CartGetRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: str
+    # etag from a previous response; if the cart is unchanged the response
+    # comes back with not_modified=True and no cart
+    if_none_match: str | None = None
 
 
 class CartGetResponse(BaseModel):
-    cart: Cart
+    cart: Cart | None = None
+    etag: str | None = None
+    not_modified: bool = False
+
+
+class CartSummaryResponse(BaseModel):
+    id: str
+    total_quantity: int = Field(alias="totalQuantity")
+    total_amount: Price = Field(alias="totalAmount")
 
 
 # ============================================================================
@@ -106,6 +196,8 @@ class CartCreateRequest(BaseModel):
 
 class CartCreateResponse(BaseModel):
     cart: Cart | None = None
+    # Same version tag a cart_get of this cart would return
+    etag: str | None = None
     user_errors: list[UserError] = Field(default=[], alias="userErrors")
     warnings: list[CartWarning] = Field(default=[])
 
@@ -117,6 +209,8 @@ class CartCreateResponse(BaseModel):
 
 class GetProductsRequest(BaseModel):
     num_results: int
+    # Same projection mask as SearchProductsRequest.fields
+    fields: frozenset[str] | None = None
 
 
 class GetProductsResponse(BaseModel):
@@ -134,3 +228,12 @@ class GetProductRequest(BaseModel):
 
 class GetProductResponse(BaseModel):
     product: Product | None
+
+
+# ============================================================================
+# Prefetch
+# ============================================================================
+
+
+# Requests a client may be asked to warm ahead of time via prefetch()
+PrefetchHint = SearchProductsRequest | CartGetRequest
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+import cachetools
+
+from agent.backend.client.base_types import CartCreateRequest, CartCreateResponse, CartGetRequest, CartGetResponse, PrefetchHint, SearchProductsRequest, SearchProductsResponse
+
+logger = logging.getLogger(__name__)
+
+# Prefetches share a few worker threads, so hints can never fan out into
+# unbounded storefront traffic
+PREFETCH_MAX_WORKERS = 2
+_PREFETCH_EXECUTOR = ThreadPoolExecutor(max_workers=PREFETCH_MAX_WORKERS, thread_name_prefix="storefront-prefetch")
+
+
+def _if_modified(req: CartGetRequest, resp: CartGetResponse) -> CartGetResponse:
+    if req.if_none_match is not None and req.if_none_match == resp.etag:
+        return CartGetResponse(etag=resp.etag, not_modified=True)
+    return resp
+
+
+class CachedStoreFrontClient:
+    """Mixin that memoizes search_products and cart_get responses with a TTL.
+
+    List it before the concrete client so its methods wrap the platform ones:
+
+        >>> class CachedShopifyStoreFrontClient(CachedStoreFrontClient, ShopifyStoreFrontClient):
+        ...     pass
+
+    The catalog changes slowly, so searches are kept for minutes; carts change
+    on every checkout step, so they are only kept for a few seconds to absorb
+    repeated reads within one agent turn. Requests are frozen models, so they
+    serve as cache keys directly, and concurrent identical requests share one
+    in-flight fetch. prefetch() fills the caches from a small shared pool of
+    worker threads.
+    Hit/miss counts are exposed in ``cache_stats``.
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        cache_maxsize: int = 1024,
+        search_cache_ttl: float = 300,
+        cart_cache_ttl: float = 5,
+        **kwargs: Any,
+    ):
+        super().__init__(*args, **kwargs)
+        self._search_cache: cachetools.TTLCache = cachetools.TTLCache(maxsize=cache_maxsize, ttl=search_cache_ttl)
+        self._cart_cache: cachetools.TTLCache = cachetools.TTLCache(maxsize=cache_maxsize, ttl=cart_cache_ttl)
+        # TTLCache is not thread-safe and the sync methods may run in workers
+        self._cache_lock = threading.Lock()
+        # Identical requests already being fetched; later callers wait on
+        # these instead of hitting the storefront again
+        self._inflight: dict[Hashable, Future] = {}
+        self.cache_stats: Counter[str] = Counter()
+
+    def _cache_get(self, cache: cachetools.TTLCache, kind: str, key: Hashable) -> Any:
+        with self._cache_lock:
+            value = cache.get(key)
+        self.cache_stats[f"{kind}_hits" if value is not None else f"{kind}_misses"] += 1
+        return value
+
+    def _cache_put(self, cache: cachetools.TTLCache, key: Hashable, value: Any) -> None:
+        with self._cache_lock:
+            cache[key] = value
+
+    def _claim(self, cache: cachetools.TTLCache, kind: str, key: Hashable) -> tuple[Any, Optional[Future], bool]:
+        """Returns (cached value, in-flight future, whether this caller must fetch)."""
+        with self._cache_lock:
+            value = cache.get(key)
+            if value is not None:
+                self.cache_stats[f"{kind}_hits"] += 1
+                return value, None, False
+            fut = self._inflight.get(key)
+            if fut is not None:
+                self.cache_stats[f"{kind}_coalesced"] += 1
+                return None, fut, False
+            self.cache_stats[f"{kind}_misses"] += 1
+            fut = self._inflight[key] = Future()
+            return None, fut, True
+
+    def _settle(self, cache: cachetools.TTLCache, key: Hashable, fut: Future, value: Any = None, exc: Optional[BaseException] = None) -> None:
+        with self._cache_lock:
+            if exc is None:
+                cache[key] = value
+            del self._inflight[key]
+        if exc is None:
+            fut.set_result(value)
+        else:
+            fut.set_exception(exc)
+
+    def _cached(self, cache: cachetools.TTLCache, kind: str, req: Any, fetch: Callable[[Any], Any]) -> Any:
+        value, fut, leader = self._claim(cache, kind, req)
+        if fut is None:
+            return value
+        if not leader:
+            return fut.result()
+        try:
+            value = fetch(req)
+        except BaseException as e:
+            self._settle(cache, req, fut, exc=e)
+            raise
+        self._settle(cache, req, fut, value)
+        return value
+
+    async def _acached(self, cache: cachetools.TTLCache, kind: str, req: Any, fetch: Callable[[Any], Awaitable[Any]]) -> Any:
+        value, fut, leader = self._claim(cache, kind, req)
+        if fut is None:
+            return value
+        if not leader:
+            # The same future is shared with sync callers (e.g. prefetch threads).
+            # Shielded, since cancelling a wrapped future cancels the shared one
+            return await asyncio.shield(asyncio.wrap_future(fut))
+        # The fetch runs as its own task so that cancelling the leader (e.g. a
+        # streaming client disconnecting) leaves it to settle for the followers
+        return await asyncio.shield(asyncio.ensure_future(self._afetch(cache, req, fut, fetch)))
+
+    async def _afetch(self, cache: cachetools.TTLCache, req: Any, fut: Future, fetch: Callable[[Any], Awaitable[Any]]) -> Any:
+        try:
+            value = await fetch(req)
+        except BaseException as e:
+            self._settle(cache, req, fut, exc=e)
+            raise
+        self._settle(cache, req, fut, value)
+        return value
+
+    def _seed_cart(self, resp: CartCreateResponse) -> None:
+        # The create response already holds the cart, so a follow-up
+        # cart_get for it is answered without another round trip
+        if resp.cart is not None:
+            self._cache_put(self._cart_cache, CartGetRequest(id=resp.cart.id), CartGetResponse(cart=resp.cart, etag=resp.etag))
+
+    def prefetch(self, hints: list[PrefetchHint]) -> None:
+        for hint in hints:
+            _PREFETCH_EXECUTOR.submit(self._prefetch_one, hint)
+
+    def _prefetch_one(self, hint: PrefetchHint) -> None:
+        try:
+            if isinstance(hint, SearchProductsRequest):
+                self.search_products(hint)
+            elif isinstance(hint, CartGetRequest):
+                self.cart_get(hint)
+        except Exception as e:
+            # A failed prefetch only means the real call will miss the cache
+            logger.warning("Prefetch of %r failed: %s", hint, e)
+
+    def search_products(self, req: SearchProductsRequest) -> SearchProductsResponse:
+        return self._cached(self._search_cache, "search", req, super().search_products)
+
+    async def asearch_products(self, req: SearchProductsRequest) -> SearchProductsResponse:
+        return await self._acached(self._search_cache, "search", req, super().asearch_products)
+
+    def search_products_batch(self, reqs: list[SearchProductsRequest]) -> list[SearchProductsResponse]:
+        results = [self._cache_get(self._search_cache, "search", req) for req in reqs]
+        misses = [i for i, result in enumerate(results) if result is None]
+        if misses:
+            # Only the uncached searches go to the storefront, still as one batch
+            fetched = super().search_products_batch([reqs[i] for i in misses])
+            for i, resp in zip(misses, fetched):
+                results[i] = resp
+                self._cache_put(self._search_cache, reqs[i], resp)
+        return results
+
+    async def asearch_products_batch(self, reqs: list[SearchProductsRequest]) -> list[SearchProductsResponse]:
+        results = [self._cache_get(self._search_cache, "search", req) for req in reqs]
+        misses = [i for i, result in enumerate(results) if result is None]
+        if misses:
+            fetched = await super().asearch_products_batch([reqs[i] for i in misses])
+            for i, resp in zip(misses, fetched):
+                results[i] = resp
+                self._cache_put(self._search_cache, reqs[i], resp)
+        return results
+
+    # Full carts are cached by id; if_none_match is checked against the
+    # cached etag, so seeded and fetched entries answer conditional reads alike
+
+    def cart_get(self, req: CartGetRequest) -> CartGetResponse:
+        resp = self._cached(self._cart_cache, "cart", CartGetRequest(id=req.id), super().cart_get)
+        return _if_modified(req, resp)
+
+    async def acart_get(self, req: CartGetRequest) -> CartGetResponse:
+        resp = await self._acached(self._cart_cache, "cart", CartGetRequest(id=req.id), super().acart_get)
+        return _if_modified(req, resp)
+
+    def cart_create(self, req: CartCreateRequest) -> CartCreateResponse:
+        resp = super().cart_create(req)
+        self._seed_cart(resp)
+        return resp
+
+    async def acart_create(self, req: CartCreateRequest) -> CartCreateResponse:
+        resp = await super().acart_create(req)
+        self._seed_cart(resp)
+        return resp
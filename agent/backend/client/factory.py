@@ -1,17 +1,27 @@
+import functools
+import os
+
 from agent.backend.client.base_types import StoreProvider
 from agent.backend.client.interface import ProductsClient, StoreFrontClient
-from agent.backend.client.shopify import ShopifyStoreFrontClient, ShopifyAdminClient
+from agent.backend.client.shopify import CachedShopifyStoreFrontClient, ShopifyStoreFrontClient, ShopifyAdminClient
 
 
+# Callers asking for the same store share one client, and with it one
+# connection pool and one response cache
+@functools.lru_cache(maxsize=8)
 def get_storefront_client(provider: StoreProvider, **provider_kwargs) -> StoreFrontClient:
     if provider == StoreProvider.SHOPIFY:
-        return ShopifyStoreFrontClient(
+        # Responses are cached unless the caller opts out with cache=False
+        client_cls = CachedShopifyStoreFrontClient if provider_kwargs.get("cache", True) else ShopifyStoreFrontClient
+        return client_cls(
             store_url=provider_kwargs.get("store_url", ""),
             access_token=provider_kwargs.get("access_token"),
+            persisted_queries=provider_kwargs.get("persisted_queries", os.getenv("SHOPIFY_PERSISTED_QUERIES") == "1"),
         )
     else:
         raise ValueError(f"Unsupported store provider: {provider}")
 
+@functools.lru_cache(maxsize=8)
 def get_products_client(provider: StoreProvider, **provider_kwargs) -> ProductsClient:
     if provider == StoreProvider.SHOPIFY:
         return ShopifyAdminClient(
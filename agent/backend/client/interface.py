@@ -1,6 +1,10 @@
+import asyncio
 from abc import ABC, abstractmethod
+from typing import AsyncIterator, ClassVar, Iterator
 
-from agent.backend.client.base_types import CartCreateRequest, CartCreateResponse, CartGetRequest, CartGetResponse, GetProductRequest, GetProductResponse, GetProductsRequest, GetProductsResponse, SearchProductsRequest, SearchProductsResponse
+import httpx
+
+from agent.backend.client.base_types import MAX_SEARCH_FIRST, CartCreateRequest, CartCreateResponse, CartGetRequest, CartGetResponse, CartSummaryResponse, GetProductRequest, GetProductResponse, GetProductsRequest, GetProductsResponse, PrefetchHint, Product, SearchProductsRequest, SearchProductsResponse
 
 
 class StoreFrontClient(ABC):
@@ -20,10 +24,24 @@ class StoreFrontClient(ABC):
         search_products: Search for products using various criteria.
         cart_create: Create a new shopping cart with optional initial items.
         cart_get: Retrieve an existing cart by its unique identifier.
+        cart_get_summary: Retrieve only a cart's id, quantity and total.
+        asearch_products, acart_create, acart_get, aget_product: Async
+            counterparts that let callers overlap requests with asyncio.gather.
+        search_products_batch, cart_get_batch, get_product_batch (and async
+            variants): Run several
+            requests at once; platforms that support it can coalesce them into
+            a single round trip.
+        iter_search_products, aiter_search_products: Yield search results one
+            product at a time, fetching later pages only when they are reached.
+        prefetch: Hint at requests that are likely to follow so caching
+            implementations can warm them in the background.
+        close: Release the pooled HTTP connections (also done on leaving a
+            ``with`` block).
     
     Example:
         >>> class ShopifyClient(StoreFrontClient):
         ...     def __init__(self, store_url: str, access_token: str):
+        ...         super().__init__()
         ...         self.store_url = store_url
         ...         self.access_token = access_token
         ...     
@@ -37,7 +55,33 @@ class StoreFrontClient(ABC):
     Note:
         This is an abstract class and cannot be instantiated directly.
         All subclasses must implement all abstract methods.
+        Subclasses should call ``super().__init__()`` and send their requests
+        through ``self._http`` so connections are kept alive across calls.
     """
+
+    # Upper bound on SearchProductsRequest.first, enforced by the request model
+    MAX_FIRST: ClassVar[int] = MAX_SEARCH_FIRST
+
+    def __init__(
+        self,
+        *,
+        pool_size: int = 20,
+        timeout: httpx.Timeout = httpx.Timeout(10.0, connect=3.0),
+    ):
+        self._limits = httpx.Limits(max_keepalive_connections=pool_size, max_connections=pool_size * 2)
+        self._timeout = timeout
+        # One pooled client per storefront, so the TCP/TLS handshake is paid once
+        self._http = httpx.Client(http2=True, limits=self._limits, timeout=self._timeout)
+
+    def close(self) -> None:
+        """Closes the pooled HTTP client."""
+        self._http.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
     
     @abstractmethod
     def search_products(
@@ -54,14 +98,22 @@ class StoreFrontClient(ABC):
             req (SearchProductsRequest): Search request containing:
                 - query (str): Search text to match against product titles, descriptions,
                   tags, and other searchable fields. Empty string returns all products.
-                - first (int): Maximum number of products to return (pagination limit).
+                - first (int): Maximum number of products to return (page size),
+                  between 1 and MAX_FIRST (250).
+                - after (str | None): Cursor taken from a previous response's
+                  end_cursor; None starts from the first page.
                 - sort_key (str): Field to sort by (e.g., "RELEVANCE", "PRICE", "TITLE").
                 - reverse (bool): Whether to reverse the sort order.
+                - fields (frozenset[str] | None): Optional Product fields to fetch;
+                  implementations should skip the rest to shrink the response.
+                  None fetches everything.
         
         Returns:
             SearchProductsResponse: Response containing:
                 - products (list[Product]): List of matching products with full details
                   including ID, title, description, images, price, and variants.
+                - end_cursor (str | None): Cursor for the next page, or None when
+                  there are no more results.
         
         Raises:
             NotImplementedError: If the method is not implemented by subclass.
@@ -81,10 +133,16 @@ class StoreFrontClient(ABC):
             >>> print(f"Found {len(response.products)} products")
             >>> for product in response.products:
             ...     print(f"- {product.title}: ${product.price.amount}")
+            >>> 
+            >>> # Walk the remaining pages by cursor rather than by offset
+            >>> while response.end_cursor:
+            ...     request = request.model_copy(update={"after": response.end_cursor})
+            ...     response = client.search_products(request)
         
         Note:
             - Search behavior (exact match vs. fuzzy search) depends on the platform.
-            - Some platforms may have limits on the maximum 'first' value.
+            - 'first' is capped at MAX_FIRST; larger values are rejected when the
+              request is built, so implementations never see them.
             - Results may be cached by the platform for performance.
         """
         pass
@@ -170,10 +228,15 @@ class StoreFrontClient(ABC):
             req (CartGetRequest): Cart retrieval request containing:
                 - id (str): The unique cart identifier returned from cart_create.
                   Format is platform-specific (e.g., "gid://shopify/Cart/abc123").
+                - if_none_match (str | None): etag from an earlier response. When
+                  the cart has not changed since, no cart is returned.
         
         Returns:
             CartGetResponse: Response containing:
-                - cart (Cart): The complete cart object with:
+                - etag (str | None): Version tag to pass back as if_none_match.
+                - not_modified (bool): True when if_none_match matched; cart is
+                  then None and the caller's copy is still current.
+                - cart (Cart | None): The complete cart object with:
                     - id (str): The cart's unique identifier.
                     - checkout_url (str): Direct URL to proceed to checkout.
                     - total_quantity (int): Total number of items across all line items.
@@ -211,6 +274,25 @@ class StoreFrontClient(ABC):
         """
         pass
 
+    @abstractmethod
+    def cart_get_summary(self, req: CartGetRequest) -> CartSummaryResponse:
+        """Retrieve a lightweight summary of an existing cart.
+
+        Use this instead of cart_get when only the item count and total are
+        needed (e.g. checking that a cart is still valid); implementations
+        should fetch just those fields.
+
+        Args:
+            req (CartGetRequest): Cart retrieval request containing the cart id.
+
+        Returns:
+            CartSummaryResponse: The cart's id, total_quantity and total_amount.
+
+        Raises:
+            LookupError: If the cart ID does not exist or has expired.
+        """
+        pass
+
     @abstractmethod
     def get_product(self, req: GetProductRequest) -> GetProductResponse:
         """Retrieve a specific product by its handle or ID.
@@ -255,6 +337,101 @@ class StoreFrontClient(ABC):
         """
         pass
     
+    @abstractmethod
+    async def asearch_products(self, req: SearchProductsRequest) -> SearchProductsResponse:
+        """Async variant of search_products.
+
+        Implementations should use a non-blocking HTTP client so several
+        requests can be in flight at once (e.g. multiplexed over HTTP/2).
+        """
+        pass
+
+    @abstractmethod
+    async def acart_create(self, req: CartCreateRequest) -> CartCreateResponse:
+        """Async variant of cart_create."""
+        pass
+
+    @abstractmethod
+    async def acart_get(self, req: CartGetRequest) -> CartGetResponse:
+        """Async variant of cart_get."""
+        pass
+
+    @abstractmethod
+    async def acart_get_summary(self, req: CartGetRequest) -> CartSummaryResponse:
+        """Async variant of cart_get_summary."""
+        pass
+
+    @abstractmethod
+    async def aget_product(self, req: GetProductRequest) -> GetProductResponse:
+        """Async variant of get_product."""
+        pass
+
+    def search_products_batch(self, reqs: list[SearchProductsRequest]) -> list[SearchProductsResponse]:
+        """Run several product searches, returning responses in request order.
+
+        The default issues one search_products call per request. Implementations
+        whose API can answer several searches in one request (e.g. aliased
+        GraphQL fields) should override this to save the extra round trips.
+        """
+        return [self.search_products(r) for r in reqs]
+
+    async def asearch_products_batch(self, reqs: list[SearchProductsRequest]) -> list[SearchProductsResponse]:
+        """Async variant of search_products_batch."""
+        return list(await asyncio.gather(*(self.asearch_products(r) for r in reqs)))
+
+    def iter_search_products(self, req: SearchProductsRequest) -> Iterator[Product]:
+        """Yield every product matching req, page by page.
+
+        Pages of req.first products are requested lazily by cursor, so a
+        caller that stops early (e.g. "first match wins") never pays for the
+        remaining pages.
+        """
+        while True:
+            resp = self.search_products(req)
+            yield from resp.products
+            if not resp.end_cursor:
+                return
+            req = req.model_copy(update={"after": resp.end_cursor})
+
+    async def aiter_search_products(self, req: SearchProductsRequest) -> AsyncIterator[Product]:
+        """Async variant of iter_search_products."""
+        while True:
+            resp = await self.asearch_products(req)
+            for product in resp.products:
+                yield product
+            if not resp.end_cursor:
+                return
+            req = req.model_copy(update={"after": resp.end_cursor})
+
+    def cart_get_batch(self, reqs: list[CartGetRequest]) -> list[CartGetResponse]:
+        """Retrieve several carts, returning responses in request order."""
+        return [self.cart_get(r) for r in reqs]
+
+    async def acart_get_batch(self, reqs: list[CartGetRequest]) -> list[CartGetResponse]:
+        """Async variant of cart_get_batch."""
+        return list(await asyncio.gather(*(self.acart_get(r) for r in reqs)))
+
+    def get_product_batch(self, reqs: list[GetProductRequest]) -> list[GetProductResponse]:
+        """Retrieve several products by ID, returning responses in request order."""
+        return [self.get_product(r) for r in reqs]
+
+    async def aget_product_batch(self, reqs: list[GetProductRequest]) -> list[GetProductResponse]:
+        """Async variant of get_product_batch."""
+        return list(await asyncio.gather(*(self.aget_product(r) for r in reqs)))
+
+    def prefetch(self, hints: list[PrefetchHint]) -> None:
+        """Warm responses for requests the caller expects to make soon.
+
+        Must return immediately. The default does nothing, since a client
+        without a cache has nowhere to keep the result; caching clients
+        fetch the hints in the background so the follow-up call is a hit.
+        """
+        pass
+
+    async def aclose(self) -> None:
+        """Releases any connections held by the async methods."""
+        pass
+
     @abstractmethod
     def get_products(self) -> GetProductsResponse:
         """Retrieve the full published product catalog.
@@ -268,6 +445,14 @@ class StoreFrontClient(ABC):
         """
         pass
 
+    async def aget_products(self) -> GetProductsResponse:
+        """Async variant of get_products.
+
+        The default runs get_products in a worker thread; implementations can
+        override it to fetch independent slices of the catalog concurrently.
+        """
+        return await asyncio.to_thread(self.get_products)
+
 class ProductsClient(ABC):
     @abstractmethod
     def get_products(self, req: GetProductsRequest) -> GetProductsResponse:
@@ -1,315 +1,288 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 import json
 import os
 from dotenv import load_dotenv
-import requests
+import cachetools
+import httpx
+import orjson
+from pydantic import ValidationError
 import logging
-import sys
 import re
 from typing import Dict, Any, Optional
 
-from agent.backend.client.base_types import Cart, CartCreateRequest, CartCreateResponse, CartGetRequest, CartGetResponse, CartLineInput, GetProductRequest, GetProductResponse, GetProductsRequest, GetProductsResponse, Product, SearchProductsRequest, SearchProductsResponse
+from agent.backend._bootstrap import ensure_bootstrapped
+from agent.backend.client.cache import CachedStoreFrontClient
+from agent.backend.client.base_types import CART_LINES_ADAPTER, PRODUCT_LIST_ADAPTER, Cart, CartCreateRequest, CartCreateResponse, CartGetRequest, CartGetResponse, CartLineInput, CartSummaryResponse, GetProductRequest, GetProductResponse, GetProductsRequest, GetProductsResponse, Product, SearchProductsRequest, SearchProductsResponse
 from agent.backend.client.interface import ProductsClient, StoreFrontClient
 
-# Configure logging to stdout
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
+ensure_bootstrapped()
 logger = logging.getLogger(__name__)
 
 
+# Optional parts of a product node, keyed by the Product field they fill.
+# id, title and priceRange (needed for price) are always selected.
+PRODUCT_FIELD_SELECTIONS = {
+    "description": """
+                    description""",
+    "online_store_url": """
+                    onlineStoreUrl""",
+    "images": """
+                    images(first: 5) {
+                        nodes {
+                            url
+                        }
+                    }""",
+    "variants": """
+                    variants(first: 10) {
+                        nodes {
+                            id
+                            title
+                            price {
+                                amount
+                                currencyCode
+                            }
+                        }
+                    }""",
+}
 
-class ShopifyStoreFrontClient(StoreFrontClient):
-    def __init__(self, store_url: str, access_token: Optional[str] = None):
-        logger.info("Initializing ShopifyStoreFrontClient")
-        logger.info(f"Store URL: {store_url}")
-        logger.info(f"Access token provided: {bool(access_token)}")
-        
-        self.store_url = store_url
-        self.access_token = access_token
-        self.headers = {
-            "Content-Type": "application/json",
-        }
-        
-        if access_token:
-            self.headers["X-Shopify-Storefront-Access-Token"] = access_token
-            logger.info("Access token added to headers")
-        
-        logger.info("ShopifyStoreFrontClient initialized successfully")
-    
-    def _execute_query(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        logger.debug("Executing GraphQL query")
-        logger.debug(f"Variables: {variables}")
-        
-        payload = {
-            "query": query,
-            "variables": variables or {}
-        }
-        
-        try:
-            logger.info(f"Sending POST request to {self.store_url}")
-            response = requests.post(
-                self.store_url,
-                headers=self.headers,
-                json=payload,
-                timeout=30
-            )
-            logger.info(f"Received response with status code: {response.status_code}")
-            
-            response.raise_for_status()
-            logger.debug("HTTP request successful")
-            
-            data = response.json()
-            logger.debug("Response parsed as JSON")
-            
-            if "errors" in data:
-                logger.error(f"GraphQL errors in response: {data['errors']}")
-                raise Exception(f"GraphQL errors: {data['errors']}")
-            
-            logger.debug("GraphQL query executed successfully")
-            return data.get("data", {})
-            
-        except requests.Timeout as e:
-            logger.error("Request timed out after 30 seconds", exc_info=True)
-            raise
-        except requests.HTTPError as e:
-            logger.error(f"HTTP error occurred: {e}", exc_info=True)
-            raise
-        except Exception as e:
-            logger.error(f"Error executing GraphQL query: {str(e)}", exc_info=True)
-            raise
+# The Admin API returns variant prices as plain strings
+ADMIN_PRODUCT_FIELD_SELECTIONS = {
+    **PRODUCT_FIELD_SELECTIONS,
+    "variants": """
+                    variants(first: 10) {
+                        nodes {
+                            id
+                            title
+                            price
+                        }
+                    }""",
+}
 
-    def get_products(self, req: GetProductsRequest) -> GetProductsResponse:
-        """
-        Retrieve all published products from Shopify Storefront API with images and detailed logging.
-        """
-        logger.info("=" * 60)
-        logger.info("Starting full product catalog fetch from Shopify Storefront API")
-        logger.info("=" * 60)
 
-        products = []
-        cursor = None
-        page = 1
+def select_product_fields(selections: Dict[str, str], fields: Optional[frozenset[str]]) -> str:
+    """Joins the selections for the requested fields (all of them when fields is None)."""
+    return "".join(sel for name, sel in selections.items() if fields is None or name in fields)
 
-        query = """
-        query($cursor:String){
-        products(first:250, after:$cursor){
-            edges{
-            cursor
-            node{
-                id
-                handle
-                title
-                description
-                vendor
-                productType
-                tags
-                onlineStoreUrl
-                images(first:5){
-                edges{
-                    node{ url }
+
+@functools.cache
+def product_search_fields(fields: Optional[frozenset[str]] = None) -> str:
+    """Selection set for a products() connection, shared by the single and batched searches."""
+    return """
+                nodes {
+                    id
+                    title""" + select_product_fields(PRODUCT_FIELD_SELECTIONS, fields) + """
+                    priceRange {
+                        minVariantPrice {
+                            amount
+                            currencyCode
+                        }
+                        maxVariantPrice {
+                            amount
+                            currencyCode
+                        }
+                    }
                 }
+                pageInfo {
+                    hasNextPage
+                    endCursor
                 }
-                variants(first:20){
-                edges{
-                    node{
+"""
+
+
+@functools.cache
+def search_products_query(fields: Optional[frozenset[str]] = None) -> str:
+    return """
+        query searchProducts($query: String!, $first: Int!, $after: String, $sortKey: ProductSortKeys!, $reverse: Boolean!) {
+            products(query: $query, first: $first, after: $after, sortKey: $sortKey, reverse: $reverse) {""" + product_search_fields(fields) + """            }
+        }
+        """
+
+
+@functools.lru_cache(maxsize=256)
+def search_products_batch_query(fields: tuple[Optional[frozenset[str]], ...]) -> str:
+    """One aliased products() field (q0, q1, ...) per search, all in a single document."""
+    params: list[str] = []
+    selections: list[str] = []
+    for i, search_fields in enumerate(fields):
+        params.append(f"$query{i}: String!, $first{i}: Int!, $after{i}: String, $sortKey{i}: ProductSortKeys!, $reverse{i}: Boolean!")
+        selections.append(
+            f"q{i}: products(query: $query{i}, first: $first{i}, after: $after{i}, sortKey: $sortKey{i}, reverse: $reverse{i}) {{"
+            + product_search_fields(search_fields) + "}"
+        )
+    return f"query searchProductsBatch({', '.join(params)}) {{\n" + "\n".join(selections) + "\n}"
+
+
+@functools.lru_cache(maxsize=256)
+def aliased_by_id_query(operation: str, alias: str, field: str, selection: str, count: int) -> str:
+    """`count` aliased field(id: $idN) lookups ({alias}0, {alias}1, ...) in a single document."""
+    params = ", ".join(f"$id{i}: ID!" for i in range(count))
+    fields = "\n".join(f"{alias}{i}: {field}(id: $id{i}) {{" + selection + "}" for i in range(count))
+    return f"query {operation}({params}) {{\n{fields}\n}}"
+
+
+@functools.cache
+def admin_products_query(fields: Optional[frozenset[str]] = None) -> str:
+    return """
+        query getProducts($first: Int!, $after: String, $query: String) {
+            products(first: $first, after: $after, query: $query, sortKey: ID) {
+                nodes {
                     id
-                    title
-                    price{amount currencyCode}
+                    title""" + select_product_fields(ADMIN_PRODUCT_FIELD_SELECTIONS, fields) + """
+                    priceRange: priceRangeV2 {
+                        minVariantPrice {
+                            amount
+                            currencyCode
+                        }
+                        maxVariantPrice {
+                            amount
+                            currencyCode
+                        }
                     }
                 }
+                pageInfo {
+                    hasNextPage
+                    endCursor
+                }
+            }
+        }
+        """
+
+
+# Catalog size and ID range, used to split a full Admin catalog fetch into
+# ID-range shards that paginate concurrently
+ADMIN_PRODUCT_BOUNDS_QUERY = """
+        query productBounds {
+            productsCount {
+                count
+            }
+            first: products(first: 1, sortKey: ID) {
+                nodes {
+                    id
                 }
             }
+            last: products(first: 1, sortKey: ID, reverse: true) {
+                nodes {
+                    id
+                }
             }
-            pageInfo{hasNextPage endCursor}
-        }
         }
         """
 
-        try:
-            while True:
-                logger.info(f"Fetching page {page} (cursor: {cursor})")
-                resp = self._execute_query(query, {"cursor": cursor})
-
-                if "errors" in resp:
-                    logger.error(f"GraphQL error(s): {resp['errors']}")
-                    raise RuntimeError(f"GraphQL errors: {resp['errors']}")
-
-                if "products" not in resp:
-                    logger.error(f"Missing 'products' key in response: {json.dumps(resp)[:500]}")
-                    raise RuntimeError("Invalid Shopify response: no products key")
-
-                products_data = resp["products"]
-                edges = products_data.get("edges", [])
-                logger.info(f"Page {page}: {len(edges)} product(s) retrieved")
-
-                for i, edge in enumerate(edges):
-                    node = edge.get("node")
-                    if not node:
-                        logger.warning(f"Edge {i} missing node")
-                        continue
-
-                    # Images
-                    image_edges = node.get("images", {}).get("edges", [])
-                    images = [img["node"]["url"] for img in image_edges if "node" in img and "url" in img["node"]]
-                    node["images"] = images or ["https://via.placeholder.com/300"]
-
-                    # Variants
-                    variant_edges = node.get("variants", {}).get("edges", [])
-                    variants = []
-                    for idx, v in enumerate(variant_edges):
-                        vn = v.get("node", {})
-                        vn.setdefault("id", f"{node['id']}_variant_{idx}")
-                        vn.setdefault("title", "Default Variant")
-                        vn.setdefault("price", {"amount": "0", "currencyCode": "USD"})
-                        variants.append(vn)
-                    node["variants"] = variants
-                    node["price"] = variants[0]["price"] if variants else {"amount": "0", "currencyCode": "USD"}
-
-                    # Fill defaults
-                    node.setdefault("vendor", "Unknown")
-                    node.setdefault("productType", "")
-                    node.setdefault("tags", [])
-                    node.setdefault("description", "")
-                    node.setdefault("onlineStoreUrl", "")
-
-                    try:
-                        product = Product(**node)
-                        products.append(product)
-                        logger.debug(f"Processed product {i + 1}: {product.title}")
-                    except Exception as ex:
-                        logger.error(f"Validation error building Product: {ex}", exc_info=True)
-
-                page_info = products_data.get("pageInfo", {})
-                has_next = page_info.get("hasNextPage")
-                cursor = page_info.get("endCursor")
-
-                logger.info(f"Page {page} processed. hasNextPage={has_next}, endCursor={cursor}")
-                if not has_next:
-                    break
+ADMIN_SHARD_CONCURRENCY = 4
 
-                page += 1
 
-            logger.info(f"Fetch complete. Total products: {len(products)}")
-            logger.info("=" * 60)
-            return GetProductsResponse(products=products)
+@functools.lru_cache(maxsize=64)
+def _encoded_query_prefix(query: str) -> bytes:
+    # Query documents are static per operation/field set, so their JSON
+    # encoding is computed once; the body is closed by graphql_body()
+    return orjson.dumps({"query": query})[:-1] + b',"variables":'
 
-        except Exception as e:
-            logger.error(f"Failed to fetch all products: {e}", exc_info=True)
-            raise
-        
-    def search_products(
-        self,
-        req: SearchProductsRequest
-    ) -> SearchProductsResponse:
-        graphql_query = """
-        query searchProducts($query: String!, $first: Int!, $sortKey: ProductSortKeys!, $reverse: Boolean!) {
-            products(query: $query, first: $first, sortKey: $sortKey, reverse: $reverse) {
-                edges {
-                    node {
+
+def graphql_body(query: str, variables: Optional[Dict[str, Any]] = None) -> bytes:
+    """JSON request body for a query, re-encoding only the variables on each call."""
+    return _encoded_query_prefix(query) + orjson.dumps(variables or {}) + b"}"
+
+
+@functools.cache
+def _query_sha256(query: str) -> str:
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+def persisted_query_body(query: str, variables: Optional[Dict[str, Any]] = None, include_query: bool = False) -> bytes:
+    """Automatic persisted query body: only the document's hash, plus the
+    document itself when registering it after a PersistedQueryNotFound."""
+    payload: Dict[str, Any] = {
+        "variables": variables or {},
+        "extensions": {"persistedQuery": {"version": 1, "sha256Hash": _query_sha256(query)}},
+    }
+    if include_query:
+        payload["query"] = query
+    return orjson.dumps(payload)
+
+
+PRODUCT_FIELDS = """
+                id
+                title
+                description
+                images(first: 5) {
+                    nodes {
+                        url
+                    }
+                }
+                variants(first: 10) {
+                    nodes {
                         id
                         title
-                        description
-                        onlineStoreUrl
-                        images(first: 5) {
-                            edges {
-                                node {
-                                    url
-                                }
-                            }
-                        }
-                        variants(first: 10) {
-                            edges {
-                                node {
-                                    id
-                                    title
-                                    price {
-                                        amount
-                                        currencyCode
-                                    }
-                                }
-                            }
-                        }
-                        priceRange {
-                            minVariantPrice {
-                                amount
-                                currencyCode
-                            }
-                            maxVariantPrice {
-                                amount
-                                currencyCode
-                            }
+                        price {
+                            amount
+                            currencyCode
                         }
                     }
                 }
-            }
+                priceRange {
+                    minVariantPrice {
+                        amount
+                        currencyCode
+                    }
+                    maxVariantPrice {
+                        amount
+                        currencyCode
+                    }
+                }
+"""
+
+GET_PRODUCT_QUERY = """
+        query getProduct($id: ID!) {
+            product(id: $id) {""" + PRODUCT_FIELDS + """            }
         }
         """
 
-        variables = {
-            "query": expand_search_query(req.query),
-            "first": min(req.first, 250),  # Shopify limit
-            "sortKey": req.sort_key,
-            "reverse": req.reverse
-        }
-        
-        logger.info(f"Capped 'first' to {variables['first']} (Shopify max: 250)")
-        
-        try:
-            logger.info("Executing product search GraphQL query")
-            data = self._execute_query(graphql_query, variables)
-            logger.info("Product search query executed successfully")
-            
-            products: list[Product] = []
-            edges = data.get("products", {}).get("edges", [])
-            logger.info(f"Processing {len(edges)} product(s) from response")
-
-            for idx, edge in enumerate(edges):
-                product = edge["node"]
-                logger.debug(f"Processing product {idx + 1}/{len(edges)}: {product.get('title')}")
-                
-                # Format images
-                images = []
-                for img_edge in product.get("images", {}).get("edges", []):
-                    images.append(img_edge["node"]["url"])
-                product["images"] = images
-                logger.debug(f"Formatted {len(images)} image(s)")
-                
-                # Format variants
-                variants = []
-                for var_edge in product.get("variants", {}).get("edges", []):
-                    variants.append(var_edge["node"])
-                product["variants"] = variants
-                logger.debug(f"Formatted {len(variants)} variant(s)")
-
-                # For single variant products, simplify the structure but keep at least one variant
-                if len(product.get("variants", [])) <= 1:
-                    price = product.get("priceRange").get("minVariantPrice")
-                    product["price"] = price
-                    product.pop("priceRange")
-                    logger.debug("Simplified price structure for single-variant product")
-
-
-                print("===================")
-                print("product", product)
-                print("===================")
-
-                
-                products.append(Product(**product))
-                logger.debug(f"Product {idx + 1} processed and added to list")
-            
-            logger.info(f"Successfully processed {len(products)} product(s)")
-            logger.info("="*60)
-            return SearchProductsResponse(products=products)
-            
-        except Exception as e:
-            logger.error(f"Failed to search products: {str(e)}", exc_info=True)
-            raise Exception(f"Failed to search products: {str(e)}")
+CART_FIELDS = """
+                id
+                checkoutUrl
+                totalQuantity
+                cost {
+                    subtotalAmount {
+                        amount
+                        currencyCode
+                    }
+                    totalAmount {
+                        amount
+                        currencyCode
+                    }
+                }
+"""
 
+def cart_etag(cart_data: Dict[str, Any]) -> str:
+    """Version tag for a raw cart node.
 
-    def cart_create(self, req: CartCreateRequest) -> CartCreateResponse:
-        graphql_mutation = """
+    Shopify's GraphQL API has no ETags, so one is derived from the CART_FIELDS
+    the cart query selects; carts returned by other operations, which select
+    more, are tagged from the same fields.
+    """
+    cost = cart_data.get("cost") or {}
+    tagged = {
+        "id": cart_data.get("id"),
+        "checkoutUrl": cart_data.get("checkoutUrl"),
+        "totalQuantity": cart_data.get("totalQuantity"),
+        "cost": {
+            "subtotalAmount": cost.get("subtotalAmount"),
+            "totalAmount": cost.get("totalAmount"),
+        },
+    }
+    return hashlib.blake2b(orjson.dumps(tagged, option=orjson.OPT_SORT_KEYS), digest_size=8).hexdigest()
+
+
+CART_GET_QUERY = """
+        query cart($id: ID!) {
+            cart(id: $id) {""" + CART_FIELDS + """            }
+        }
+        """
+
+CART_CREATE_MUTATION = """
         mutation cartCreate($input: CartInput!) {
             cartCreate(input: $input) {
                 cart {
@@ -363,122 +336,687 @@ class ShopifyStoreFrontClient(StoreFrontClient):
             }
         }
         """
+
+# Just enough to answer "is the cart still there and what does it total?"
+CART_SUMMARY_QUERY = """
+        query cartSummary($id: ID!) {
+            cart(id: $id) {
+                id
+                totalQuantity
+                cost {
+                    totalAmount {
+                        amount
+                        currencyCode
+                    }
+                }
+            }
+        }
+        """
+
+
+# Full-catalog page; $query narrows it to one shard (null fetches everything).
+# Selects only what Product keeps, since each page is buffered and parsed whole
+CATALOG_PAGE_QUERY = """
+        query($cursor:String, $query:String){
+        products(first:250, after:$cursor, query:$query){
+            nodes{
+                id
+                title
+                description
+                onlineStoreUrl
+                images(first:5){
+                nodes{ url }
+                }
+                variants(first:20){
+                nodes{
+                    id
+                    title
+                    price{amount currencyCode}
+                }
+                }
+            }
+            pageInfo{hasNextPage endCursor}
+        }
+        }
+        """
+
+PRODUCT_TYPES_QUERY = """
+        query productTypes {
+            productTypes(first: 250) {
+                nodes
+            }
+        }
+        """
+
+# Fallbacks for catalog products without images or variants; pydantic copies
+# them into each Product, so one shared instance is enough
+CATALOG_PLACEHOLDER_IMAGES = ["https://via.placeholder.com/300"]
+CATALOG_ZERO_PRICE = {"amount": "0", "currencyCode": "USD"}
+
+# Catalog shards fetched at once by aget_products
+CATALOG_SHARD_CONCURRENCY = 10
+
+# Assembled full catalogs by store URL, shared by get_products/aget_products
+CATALOG_CACHE_TTL_SECONDS = 600
+_CATALOG_CACHE: cachetools.TTLCache = cachetools.TTLCache(maxsize=16, ttl=CATALOG_CACHE_TTL_SECONDS)
+
+
+class ShopifyStoreFrontClient(StoreFrontClient):
+    def __init__(self, store_url: str, access_token: Optional[str] = None, persisted_queries: bool = False):
+        logger.info("Initializing ShopifyStoreFrontClient")
+        logger.info(f"Store URL: {store_url}")
+        logger.info(f"Access token provided: {bool(access_token)}")
+
+        super().__init__(timeout=httpx.Timeout(30.0, connect=3.0))
+        self.store_url = store_url
+        self.access_token = access_token
+        self.headers = {
+            "Content-Type": "application/json",
+            # Catalog pages repeat the same keys per product and compress
+            # several-fold; httpx decodes br through the Brotli package
+            "Accept-Encoding": "br, gzip",
+        }
+        
+        if access_token:
+            self.headers["X-Shopify-Storefront-Access-Token"] = access_token
+            logger.info("Access token added to headers")
+
+        self._http.headers.update(self.headers)
+        # Created on first async call so it binds to the running event loop
+        self._async_client: Optional[httpx.AsyncClient] = None
+        # Send query hashes instead of documents; turned off again if the
+        # store rejects a hash-only request
+        self._persisted_queries = persisted_queries
+        
+        logger.info("ShopifyStoreFrontClient initialized successfully")
+    
+    def _execute_query(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        logger.debug("Executing GraphQL query")
+        logger.debug("Variables: %s", variables)
+        
+        try:
+            response = self._http.post(self.store_url, content=self._request_body(query, variables))
+            logger.debug("POST %s -> %s", self.store_url, response.status_code)
+            logger.debug("Response Content-Encoding: %s", response.headers.get("Content-Encoding"))
+            
+            data, retry_body = self._persisted_query_retry(response, query, variables)
+            if retry_body is not None:
+                response = self._http.post(self.store_url, content=retry_body)
+                data = None
+            
+            response.raise_for_status()
+            logger.debug("HTTP request successful")
+            
+            if data is None:
+                data = orjson.loads(response.content)
+            logger.debug("Response parsed as JSON")
+            
+            if "errors" in data:
+                logger.error(f"GraphQL errors in response: {data['errors']}")
+                raise Exception(f"GraphQL errors: {data['errors']}")
+            
+            logger.debug("GraphQL query executed successfully")
+            return data["data"]
+            
+        except httpx.TimeoutException:
+            logger.error("Request timed out after 30 seconds", exc_info=True)
+            raise
+        except httpx.HTTPStatusError as e:
+            logger.error(f"HTTP error occurred: {e}", exc_info=True)
+            raise
+        except Exception as e:
+            logger.error(f"Error executing GraphQL query: {str(e)}", exc_info=True)
+            raise
+
+    def _request_body(self, query: str, variables: Optional[Dict[str, Any]]) -> bytes:
+        if self._persisted_queries:
+            return persisted_query_body(query, variables)
+        return graphql_body(query, variables)
+
+    def _persisted_query_retry(self, response: httpx.Response, query: str, variables: Optional[Dict[str, Any]]) -> tuple[Optional[Dict[str, Any]], Optional[bytes]]:
+        """Checks the response to a hash-only request.
+
+        Returns the parsed body (None if it was not parsed) and the body to
+        resend, if any. Shopify does not document persisted queries, so any
+        rejection of a hash-only request, a 4xx status or a GraphQL error
+        other than PersistedQueryNotFound, is retried with the full document
+        and hashes are turned off for this client.
+        """
+        if not self._persisted_queries:
+            return None, None
+        data = None
+        if response.is_success:
+            data = orjson.loads(response.content)
+            if "errors" not in data:
+                return data, None
+            if any(error.get("message") == "PersistedQueryNotFound" for error in data["errors"]):
+                # Registers the document under its hash for subsequent calls
+                return data, persisted_query_body(query, variables, include_query=True)
+        elif not response.is_client_error:
+            return None, None
+        logger.warning("Persisted query rejected (HTTP %s); sending full documents", response.status_code)
+        self._persisted_queries = False
+        return data, graphql_body(query, variables)
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None:
+            # HTTP/2 lets concurrent queries share one TLS connection
+            self._async_client = httpx.AsyncClient(
+                headers=self.headers,
+                http2=True,
+                timeout=self._timeout,
+                limits=self._limits,
+            )
+        return self._async_client
+
+    async def _aexecute_query(self, query: str, variables: Optional[Dict[str, Any]] = None, client: Optional[httpx.AsyncClient] = None) -> Dict[str, Any]:
+        logger.debug("Executing GraphQL query (async)")
+        logger.debug("Variables: %s", variables)
+
+        client = client or self._get_async_client()
+        try:
+            response = await client.post(self.store_url, content=self._request_body(query, variables))
+            logger.debug("POST %s -> %s", self.store_url, response.status_code)
+            logger.debug("Response Content-Encoding: %s", response.headers.get("Content-Encoding"))
+
+            data, retry_body = self._persisted_query_retry(response, query, variables)
+            if retry_body is not None:
+                response = await client.post(self.store_url, content=retry_body)
+                data = None
+
+            response.raise_for_status()
+            if data is None:
+                data = orjson.loads(response.content)
+
+            if "errors" in data:
+                logger.error(f"GraphQL errors in response: {data['errors']}")
+                raise Exception(f"GraphQL errors: {data['errors']}")
+
+            return data["data"]
+
+        except httpx.TimeoutException:
+            logger.error("Request timed out after 30 seconds", exc_info=True)
+            raise
+        except httpx.HTTPStatusError as e:
+            logger.error(f"HTTP error occurred: {e}", exc_info=True)
+            raise
+        except Exception as e:
+            logger.error(f"Error executing GraphQL query: {str(e)}", exc_info=True)
+            raise
+
+    async def aclose(self) -> None:
+        """Closes the pooled async HTTP client, if one was opened."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    def invalidate_catalog(self) -> None:
+        """Drops this store's cached catalog so the next fetch goes to Shopify."""
+        _CATALOG_CACHE.pop(self.store_url, None)
+
+    def _parse_catalog_page(self, resp: Dict[str, Any], page: int) -> tuple[list[Product], Optional[str]]:
+        """Builds the products of one catalog page; returns them with the next cursor (None on the last page)."""
+        if "products" not in resp:
+            logger.error(f"Missing 'products' key in response: {json.dumps(resp)[:500]}")
+            raise RuntimeError("Invalid Shopify response: no products key")
+
+        products_data = resp["products"]
+        raw_products: list[dict[str, Any]] = products_data["nodes"]
+        logger.info("Page %d: %d product(s) retrieved", page, len(raw_products))
+
+        for node in raw_products:
+            # The RAG corpus expects every product to have an image and a price;
+            # both connections are always selected, so index them directly
+            if not node["images"]["nodes"]:
+                node["images"] = CATALOG_PLACEHOLDER_IMAGES
+            if not node["variants"]["nodes"]:
+                node["price"] = CATALOG_ZERO_PRICE
+
+        try:
+            # One pydantic-core pass for the whole page
+            products = PRODUCT_LIST_ADAPTER.validate_python(raw_products)
+        except ValidationError:
+            # Fall back to per-product validation so one bad node doesn't drop the page
+            products = []
+            for node in raw_products:
+                try:
+                    products.append(Product.model_validate(node))
+                except ValidationError as ex:
+                    logger.error(f"Validation error building Product: {ex}", exc_info=True)
+
+        page_info = products_data["pageInfo"]
+        has_next = page_info["hasNextPage"]
+        cursor = page_info["endCursor"]
+
+        logger.debug("Page %d processed. hasNextPage=%s, endCursor=%s", page, has_next, cursor)
+        return products, cursor if has_next else None
+
+    def get_products(self, req: Optional[GetProductsRequest] = None) -> GetProductsResponse:
+        """
+        Retrieve all published products from Shopify Storefront API with images and detailed logging.
+        """
+        cached = _CATALOG_CACHE.get(self.store_url)
+        if cached is not None:
+            logger.info("Returning cached product catalog")
+            return cached
+
+        logger.info("Starting full product catalog fetch from Shopify Storefront API")
+
+        products = []
+        cursor = None
+        page = 1
+
+        try:
+            while True:
+                logger.debug("Fetching page %d (cursor: %s)", page, cursor)
+                resp = self._execute_query(CATALOG_PAGE_QUERY, {"cursor": cursor, "query": None})
+                page_products, cursor = self._parse_catalog_page(resp, page)
+                products.extend(page_products)
+                if cursor is None:
+                    break
+
+                page += 1
+
+            logger.info(f"Fetch complete. Total products: {len(products)}")
+            resp = GetProductsResponse(products=products)
+            _CATALOG_CACHE[self.store_url] = resp
+            return resp
+
+        except Exception as e:
+            logger.error(f"Failed to fetch all products: {e}", exc_info=True)
+            raise
+
+    async def _afetch_catalog_shard(self, client: httpx.AsyncClient, sem: asyncio.Semaphore, query: Optional[str]) -> list[Product]:
+        # Cursors can't be predicted, so pages within a shard are fetched in
+        # order; a producer requests the next page while this coroutine
+        # validates the current one. The queue holds raw pages, then None
+        # at the end (or the producer's exception)
+        pages: asyncio.Queue[Any] = asyncio.Queue(maxsize=2)
+
+        async def produce() -> None:
+            cursor = None
+            page = 1
+            try:
+                while True:
+                    logger.debug("Fetching shard %r page %d", query, page)
+                    resp = await self._aexecute_query(CATALOG_PAGE_QUERY, {"cursor": cursor, "query": query}, client=client)
+                    await pages.put(resp)
+                    page_info = resp.get("products", {}).get("pageInfo") or {}
+                    if not page_info.get("hasNextPage"):
+                        break
+                    cursor = page_info["endCursor"]
+                    page += 1
+                await pages.put(None)
+            except Exception as e:
+                await pages.put(e)
+
+        products: list[Product] = []
+        async with sem:
+            producer = asyncio.create_task(produce())
+            try:
+                page = 1
+                while (resp := await pages.get()) is not None:
+                    if isinstance(resp, Exception):
+                        raise resp
+                    page_products, _ = self._parse_catalog_page(resp, page)
+                    products.extend(page_products)
+                    page += 1
+            finally:
+                producer.cancel()
+        return products
+
+    async def aget_products(self, req: Optional[GetProductsRequest] = None) -> GetProductsResponse:
+        """
+        Retrieve all published products, fetching one shard per product type concurrently.
+
+        A final shard excludes every known type so untyped products are not
+        missed; products are de-duplicated by id.
+        """
+        cached = _CATALOG_CACHE.get(self.store_url)
+        if cached is not None:
+            logger.info("Returning cached product catalog")
+            return cached
+
+        logger.info("Starting sharded product catalog fetch from Shopify Storefront API")
+        try:
+            # A dedicated client, so this also works from a one-off asyncio.run
+            async with httpx.AsyncClient(headers=self.headers, http2=True, timeout=self._timeout, limits=self._limits) as client:
+                data = await self._aexecute_query(PRODUCT_TYPES_QUERY, client=client)
+                product_types = [pt for pt in data.get("productTypes", {}).get("nodes", []) if pt]
+                logger.info("Sharding catalog fetch across %d product type(s)", len(product_types))
+
+                queries: list[Optional[str]] = [None]
+                if product_types:
+                    quoted = [json.dumps(pt) for pt in product_types]
+                    queries = [f"product_type:{q}" for q in quoted]
+                    queries.append(" AND ".join(f"NOT product_type:{q}" for q in quoted))
+
+                sem = asyncio.Semaphore(CATALOG_SHARD_CONCURRENCY)
+                shards = await asyncio.gather(*(self._afetch_catalog_shard(client, sem, q) for q in queries))
+
+            products: dict[str, Product] = {}
+            for shard in shards:
+                for product in shard:
+                    products.setdefault(product.id, product)
+
+            logger.info("Fetch complete. Total products: %d", len(products))
+            resp = GetProductsResponse(products=list(products.values()))
+            _CATALOG_CACHE[self.store_url] = resp
+            return resp
+
+        except Exception as e:
+            logger.error("Failed to fetch all products: %s", e, exc_info=True)
+            raise
         
+    def _search_products_operation(self, req: SearchProductsRequest) -> tuple[str, Dict[str, Any]]:
+        graphql_query = search_products_query(req.fields)
+
+        variables = {
+            "query": expand_search_query(req.query),
+            "first": req.first,
+            "after": req.after,
+            "sortKey": req.sort_key,
+            "reverse": req.reverse
+        }
+
+        return graphql_query, variables
+
+    def _parse_search_products(self, data: Dict[str, Any]) -> SearchProductsResponse:
+        products_data = data["products"]
+        raw_products = products_data["nodes"]
+
+        # Product unwraps the images/variants connections while validating
+        products = PRODUCT_LIST_ADAPTER.validate_python(raw_products)
+
+        # Only hand back a cursor when there is another page to fetch
+        page_info = products_data["pageInfo"]
+        end_cursor = page_info["endCursor"] if page_info["hasNextPage"] else None
+        
+        logger.info("Parsed %d product(s)", len(products))
+        return SearchProductsResponse(products=products, end_cursor=end_cursor)
+
+    def search_products(self, req: SearchProductsRequest) -> SearchProductsResponse:
+        graphql_query, variables = self._search_products_operation(req)
+        try:
+            logger.debug("Executing product search GraphQL query")
+            data = self._execute_query(graphql_query, variables)
+            logger.debug("Product search query executed successfully")
+            return self._parse_search_products(data)
+
+        except Exception as e:
+            logger.error(f"Failed to search products: {str(e)}", exc_info=True)
+            raise Exception(f"Failed to search products: {str(e)}")
+
+    async def asearch_products(self, req: SearchProductsRequest) -> SearchProductsResponse:
+        graphql_query, variables = self._search_products_operation(req)
+        try:
+            logger.debug("Executing product search GraphQL query")
+            data = await self._aexecute_query(graphql_query, variables)
+            logger.debug("Product search query executed successfully")
+            return self._parse_search_products(data)
+
+        except Exception as e:
+            logger.error(f"Failed to search products: {str(e)}", exc_info=True)
+            raise Exception(f"Failed to search products: {str(e)}")
+
+    def _search_products_batch_operation(self, reqs: list[SearchProductsRequest]) -> tuple[str, Dict[str, Any]]:
+        graphql_query = search_products_batch_query(tuple(req.fields for req in reqs))
+        variables: Dict[str, Any] = {}
+        for i, req in enumerate(reqs):
+            variables[f"query{i}"] = expand_search_query(req.query)
+            variables[f"first{i}"] = req.first
+            variables[f"after{i}"] = req.after
+            variables[f"sortKey{i}"] = req.sort_key
+            variables[f"reverse{i}"] = req.reverse
+        return graphql_query, variables
+
+    def _parse_search_products_batch(self, reqs: list[SearchProductsRequest], data: Dict[str, Any]) -> list[SearchProductsResponse]:
+        return [self._parse_search_products({"products": data[f"q{i}"]}) for i in range(len(reqs))]
+
+    def search_products_batch(self, reqs: list[SearchProductsRequest]) -> list[SearchProductsResponse]:
+        if not reqs:
+            return []
+        graphql_query, variables = self._search_products_batch_operation(reqs)
+        try:
+            logger.info(f"Executing batched product search GraphQL query ({len(reqs)} searches)")
+            data = self._execute_query(graphql_query, variables)
+            return self._parse_search_products_batch(reqs, data)
+
+        except Exception as e:
+            logger.error(f"Failed to search products: {str(e)}", exc_info=True)
+            raise Exception(f"Failed to search products: {str(e)}")
+
+    async def asearch_products_batch(self, reqs: list[SearchProductsRequest]) -> list[SearchProductsResponse]:
+        if not reqs:
+            return []
+        graphql_query, variables = self._search_products_batch_operation(reqs)
+        try:
+            logger.info(f"Executing batched product search GraphQL query ({len(reqs)} searches)")
+            data = await self._aexecute_query(graphql_query, variables)
+            return self._parse_search_products_batch(reqs, data)
+
+        except Exception as e:
+            logger.error(f"Failed to search products: {str(e)}", exc_info=True)
+            raise Exception(f"Failed to search products: {str(e)}")
+
+    def _cart_create_operation(self, req: CartCreateRequest) -> tuple[str, Dict[str, Any]]:
         # Only pass lines to the mutation
         variables = {
             "input": {
-                "lines": [line.model_dump(by_alias=True) for line in (req.lines or [])]
+                # Serialized to JSON by pydantic-core and embedded as-is by orjson
+                "lines": orjson.Fragment(CART_LINES_ADAPTER.dump_json(req.lines or [], by_alias=True))
             }
         }
         
         logger.info("Prepared cart creation variables")
-        logger.debug(f"Variables: {variables}")
+        logger.debug("Variables: %s", variables)
+        return CART_CREATE_MUTATION, variables
+
+    def _parse_cart_create(self, data: Dict[str, Any]) -> CartCreateResponse:
+        cart_create_data = data.get("cartCreate", {})
+
+        cart_data = cart_create_data.get("cart", {})
+        user_errors = cart_create_data.get("userErrors", [])
+        warnings = cart_create_data.get("warnings", [])
+        
+        if user_errors:
+            logger.warning(f"Cart creation returned {len(user_errors)} user error(s)")
+            for error in user_errors:
+                logger.warning(f"User error: {error.get('message')} (field: {error.get('field')})")
+        
+        if warnings:
+            logger.info(f"Cart creation returned {len(warnings)} warning(s)")
+            for warning in warnings:
+                logger.info(f"Warning: {warning.get('message')}")
+        
+        if cart_data:
+            logger.info(f"Cart created with ID: {cart_data.get('id')}")
+            logger.info(f"Cart total quantity: {cart_data.get('totalQuantity')}")
+            logger.info(f"Checkout URL: {cart_data.get('checkoutUrl')}")
+            cost = cart_data.get('cost', {})
+            if cost:
+                subtotal = cost.get('subtotalAmount', {})
+                total = cost.get('totalAmount', {})
+                logger.info(f"Subtotal: {subtotal.get('amount')} {subtotal.get('currencyCode')}")
+                logger.info(f"Total: {total.get('amount')} {total.get('currencyCode')}")
+        else:
+            logger.info("No cart data returned")
+            cart_data = {}
         
+
+        cart = None
+        etag = None
+        if cart_data:
+            cart = Cart.model_validate(cart_data)
+            etag = cart_etag(cart_data)
+
+        return CartCreateResponse(
+            cart=cart,
+            etag=etag,
+            userErrors=user_errors,
+            warnings=warnings
+        )
+
+    def cart_create(self, req: CartCreateRequest) -> CartCreateResponse:
+        graphql_mutation, variables = self._cart_create_operation(req)
         try:
             logger.info("Executing cart creation GraphQL mutation")
             data = self._execute_query(graphql_mutation, variables)
             logger.info("Cart creation mutation executed successfully")
-            
-            cart_create_data = data.get("cartCreate", {})
+            return self._parse_cart_create(data)
 
-            cart_data = cart_create_data.get("cart", {})
-            user_errors = cart_create_data.get("userErrors", [])
-            warnings = cart_create_data.get("warnings", [])
-            
-            if user_errors:
-                logger.warning(f"Cart creation returned {len(user_errors)} user error(s)")
-                for error in user_errors:
-                    logger.warning(f"User error: {error.get('message')} (field: {error.get('field')})")
-            
-            if warnings:
-                logger.info(f"Cart creation returned {len(warnings)} warning(s)")
-                for warning in warnings:
-                    logger.info(f"Warning: {warning.get('message')}")
-            
-            if cart_data:
-                logger.info(f"Cart created with ID: {cart_data.get('id')}")
-                logger.info(f"Cart total quantity: {cart_data.get('totalQuantity')}")
-                logger.info(f"Checkout URL: {cart_data.get('checkoutUrl')}")
-                cost = cart_data.get('cost', {})
-                if cost:
-                    subtotal = cost.get('subtotalAmount', {})
-                    total = cost.get('totalAmount', {})
-                    logger.info(f"Subtotal: {subtotal.get('amount')} {subtotal.get('currencyCode')}")
-                    logger.info(f"Total: {total.get('amount')} {total.get('currencyCode')}")
-            else:
-                logger.info("No cart data returned")
-                cart_data = {}
-            
-            logger.info("="*60)
+        except Exception as e:
+            logger.error(f"Failed to create cart: {str(e)}", exc_info=True)
+            raise Exception(f"Failed to create cart: {str(e)}")
 
-            cart = None
-            if cart_data:
-                cart = Cart(**cart_data)
+    async def acart_create(self, req: CartCreateRequest) -> CartCreateResponse:
+        graphql_mutation, variables = self._cart_create_operation(req)
+        try:
+            logger.info("Executing cart creation GraphQL mutation")
+            data = await self._aexecute_query(graphql_mutation, variables)
+            logger.info("Cart creation mutation executed successfully")
+            return self._parse_cart_create(data)
 
-            return CartCreateResponse(
-                cart=cart,
-                userErrors=user_errors,
-                warnings=warnings
-            )
-            
         except Exception as e:
             logger.error(f"Failed to create cart: {str(e)}", exc_info=True)
             raise Exception(f"Failed to create cart: {str(e)}")
 
-
-    def cart_get(self, req: CartGetRequest) -> CartGetResponse:
-        graphql_query = """
-        query cart($id: ID!) {
-            cart(id: $id) {
-                id
-                checkoutUrl
-                totalQuantity
-                cost {
-                    subtotalAmount {
-                        amount
-                        currencyCode
-                    }
-                    totalAmount {
-                        amount
-                        currencyCode
-                    }
-                }
-            }
-        }
-        """
+    def _cart_get_operation(self, req: CartGetRequest) -> tuple[str, Dict[str, Any]]:
+        graphql_query = CART_GET_QUERY
 
         variables = {
             "id": req.id
         }
+        return graphql_query, variables
+
+    def _parse_cart_get(self, req: CartGetRequest, data: Dict[str, Any]) -> CartGetResponse:
+        cart_data = data.get("cart")
+        
+        if cart_data is None:
+            logger.error(f"Cart with id {req.id} not found")
+            raise Exception(f"Cart with id {req.id} not found")
 
+        etag = cart_etag(cart_data)
+        if req.if_none_match == etag:
+            logger.info(f"Cart {req.id} not modified")
+            return CartGetResponse(etag=etag, not_modified=True)
+        
+        logger.info(f"Cart retrieved with ID: {cart_data.get('id')}")
+        logger.info(f"Cart total quantity: {cart_data.get('totalQuantity')}")
+        logger.info(f"Checkout URL: {cart_data.get('checkoutUrl')}")
+        cost = cart_data.get('cost', {})
+        if cost:
+            subtotal = cost.get('subtotalAmount', {})
+            total = cost.get('totalAmount', {})
+            logger.info(f"Subtotal: {subtotal.get('amount')} {subtotal.get('currencyCode')}")
+            logger.info(f"Total: {total.get('amount')} {total.get('currencyCode')}")
+        
+        return CartGetResponse(cart=Cart.model_validate(cart_data), etag=etag)
+
+    def cart_get(self, req: CartGetRequest) -> CartGetResponse:
+        graphql_query, variables = self._cart_get_operation(req)
         try:
             logger.info("Executing cart retrieval GraphQL query")
             data = self._execute_query(graphql_query, variables)
             logger.info("Cart retrieval query executed successfully")
-            
-            cart_data = data.get("cart")
-            
-            if cart_data is None:
-                logger.error(f"Cart with id {req.id} not found")
-                raise Exception(f"Cart with id {req.id} not found")
-            
-            logger.info(f"Cart retrieved with ID: {cart_data.get('id')}")
-            logger.info(f"Cart total quantity: {cart_data.get('totalQuantity')}")
-            logger.info(f"Checkout URL: {cart_data.get('checkoutUrl')}")
-            cost = cart_data.get('cost', {})
-            if cost:
-                subtotal = cost.get('subtotalAmount', {})
-                total = cost.get('totalAmount', {})
-                logger.info(f"Subtotal: {subtotal.get('amount')} {subtotal.get('currencyCode')}")
-                logger.info(f"Total: {total.get('amount')} {total.get('currencyCode')}")
-            
-            logger.info("="*60)
-            return CartGetResponse(cart=Cart(**cart_data))
-            
+            return self._parse_cart_get(req, data)
+
+        except Exception as e:
+            logger.error(f"Failed to get cart: {str(e)}", exc_info=True)
+            raise Exception(f"Failed to get cart: {str(e)}")
+
+    async def acart_get(self, req: CartGetRequest) -> CartGetResponse:
+        graphql_query, variables = self._cart_get_operation(req)
+        try:
+            logger.info("Executing cart retrieval GraphQL query")
+            data = await self._aexecute_query(graphql_query, variables)
+            logger.info("Cart retrieval query executed successfully")
+            return self._parse_cart_get(req, data)
+
+        except Exception as e:
+            logger.error(f"Failed to get cart: {str(e)}", exc_info=True)
+            raise Exception(f"Failed to get cart: {str(e)}")
+
+    def _cart_get_batch_operation(self, reqs: list[CartGetRequest]) -> tuple[str, Dict[str, Any]]:
+        graphql_query = aliased_by_id_query("cartBatch", "c", "cart", CART_FIELDS, len(reqs))
+        variables = {f"id{i}": req.id for i, req in enumerate(reqs)}
+        return graphql_query, variables
+
+    def _parse_cart_get_batch(self, reqs: list[CartGetRequest], data: Dict[str, Any]) -> list[CartGetResponse]:
+        return [self._parse_cart_get(req, {"cart": data.get(f"c{i}")}) for i, req in enumerate(reqs)]
+
+    def cart_get_batch(self, reqs: list[CartGetRequest]) -> list[CartGetResponse]:
+        if not reqs:
+            return []
+        graphql_query, variables = self._cart_get_batch_operation(reqs)
+        try:
+            logger.info(f"Executing batched cart retrieval GraphQL query ({len(reqs)} carts)")
+            data = self._execute_query(graphql_query, variables)
+            return self._parse_cart_get_batch(reqs, data)
+
+        except Exception as e:
+            logger.error(f"Failed to get cart: {str(e)}", exc_info=True)
+            raise Exception(f"Failed to get cart: {str(e)}")
+
+    async def acart_get_batch(self, reqs: list[CartGetRequest]) -> list[CartGetResponse]:
+        if not reqs:
+            return []
+        graphql_query, variables = self._cart_get_batch_operation(reqs)
+        try:
+            logger.info(f"Executing batched cart retrieval GraphQL query ({len(reqs)} carts)")
+            data = await self._aexecute_query(graphql_query, variables)
+            return self._parse_cart_get_batch(reqs, data)
+
         except Exception as e:
             logger.error(f"Failed to get cart: {str(e)}", exc_info=True)
             raise Exception(f"Failed to get cart: {str(e)}")
 
+    def _parse_cart_get_summary(self, req: CartGetRequest, data: Dict[str, Any]) -> CartSummaryResponse:
+        cart_data = data.get("cart")
+        if cart_data is None:
+            logger.error(f"Cart with id {req.id} not found")
+            raise Exception(f"Cart with id {req.id} not found")
+
+        return CartSummaryResponse(
+            id=cart_data["id"],
+            totalQuantity=cart_data["totalQuantity"],
+            totalAmount=cart_data["cost"]["totalAmount"],
+        )
+
+    def cart_get_summary(self, req: CartGetRequest) -> CartSummaryResponse:
+        try:
+            data = self._execute_query(CART_SUMMARY_QUERY, {"id": req.id})
+            return self._parse_cart_get_summary(req, data)
+
+        except Exception as e:
+            logger.error(f"Failed to get cart summary: {str(e)}", exc_info=True)
+            raise Exception(f"Failed to get cart summary: {str(e)}")
+
+    async def acart_get_summary(self, req: CartGetRequest) -> CartSummaryResponse:
+        try:
+            data = await self._aexecute_query(CART_SUMMARY_QUERY, {"id": req.id})
+            return self._parse_cart_get_summary(req, data)
+
+        except Exception as e:
+            logger.error(f"Failed to get cart summary: {str(e)}", exc_info=True)
+            raise Exception(f"Failed to get cart summary: {str(e)}")
+
+    def _get_product_operation(self, req: GetProductRequest) -> tuple[str, Dict[str, Any]]:
+        variables = {"id": req.id}
+        logger.info("Fetching product by ID: %s", req.id)
+        return GET_PRODUCT_QUERY, variables
+
+    def _parse_get_product(self, req: GetProductRequest, data: Dict[str, Any]) -> GetProductResponse:
+        product_data = data.get("product")
+        
+        if product_data is None:
+            logger.info("Product not found: %s", req.id)
+            return GetProductResponse(product=None)
+        
+        product = Product.model_validate(product_data)
+        logger.debug("Retrieved product: %s", product.title)
+        return GetProductResponse(product=product)
+
     def get_product(self, req: GetProductRequest) -> GetProductResponse:
         """
         Retrieve a specific product by its handle or ID from Shopify Storefront API.
@@ -489,126 +1027,112 @@ class ShopifyStoreFrontClient(StoreFrontClient):
         Returns:
             GetProductResponse: Response containing the product or None if not found
         """
-        
-        # Build the query based on what's provided (id takes precedence)
-        graphql_query = """
-        query getProduct($id: ID!) {
-            product(id: $id) {
-                id
-                title
-                description
-                images(first: 5) {
-                    edges {
-                        node {
-                            url
-                        }
-                    }
-                }
-                variants(first: 10) {
-                    edges {
-                        node {
-                            id
-                            title
-                            price {
-                                amount
-                                currencyCode
-                            }
-                        }
-                    }
-                }
-                priceRange {
-                    minVariantPrice {
-                        amount
-                        currencyCode
-                    }
-                    maxVariantPrice {
-                        amount
-                        currencyCode
-                    }
-                }
-            }
-        }
-        """
-        variables = {"id": req.id}
-        logger.info(f"Fetching product by ID: {req.id}")
-        
+        graphql_query, variables = self._get_product_operation(req)
         try:
-            logger.info("Executing product retrieval GraphQL query")
+            logger.debug("Executing product retrieval GraphQL query")
             data = self._execute_query(graphql_query, variables)
-            logger.info("Product retrieval query executed successfully")
-            
-            product_data = data.get("product")
-            
-            if product_data is None:
-                logger.info(f"Product not found: {req.id}")
-                return GetProductResponse(product=None)
-            
-            logger.info(f"Product found: {product_data.get('title')}")
-            
-            # Format images
-            images = []
-            for img_edge in product_data.get("images", {}).get("edges", []):
-                images.append(img_edge["node"]["url"])
-            product_data["images"] = images
-            logger.debug(f"Formatted {len(images)} image(s)")
-            
-            # Format variants
-            variants = []
-            for var_edge in product_data.get("variants", {}).get("edges", []):
-                variants.append(var_edge["node"])
-            product_data["variants"] = variants
-            logger.debug(f"Formatted {len(variants)} variant(s)")
-            
-            # For single variant products, simplify the structure
-            if len(product_data.get("variants", [])) <= 1:
-                price = product_data.get("priceRange", {}).get("minVariantPrice")
-                if price:
-                    product_data["price"] = price
-                    product_data.pop("priceRange", None)
-                    logger.debug("Simplified price structure for single-variant product")
-            
-            product = Product(**product_data)
-            logger.info(f"Successfully retrieved product: {product.title}")
-            logger.info("="*60)
-            return GetProductResponse(product=product)
-            
+            logger.debug("Product retrieval query executed successfully")
+            return self._parse_get_product(req, data)
+
+        except Exception as e:
+            logger.error(f"Failed to get product: {str(e)}", exc_info=True)
+            raise Exception(f"Failed to get product: {str(e)}")
+
+    async def aget_product(self, req: GetProductRequest) -> GetProductResponse:
+        graphql_query, variables = self._get_product_operation(req)
+        try:
+            logger.debug("Executing product retrieval GraphQL query")
+            data = await self._aexecute_query(graphql_query, variables)
+            logger.debug("Product retrieval query executed successfully")
+            return self._parse_get_product(req, data)
+
+        except Exception as e:
+            logger.error(f"Failed to get product: {str(e)}", exc_info=True)
+            raise Exception(f"Failed to get product: {str(e)}")
+
+    def _get_product_batch_operation(self, reqs: list[GetProductRequest]) -> tuple[str, Dict[str, Any]]:
+        graphql_query = aliased_by_id_query("getProductBatch", "p", "product", PRODUCT_FIELDS, len(reqs))
+        variables = {f"id{i}": req.id for i, req in enumerate(reqs)}
+        return graphql_query, variables
+
+    def _parse_get_product_batch(self, reqs: list[GetProductRequest], data: Dict[str, Any]) -> list[GetProductResponse]:
+        return [self._parse_get_product(req, {"product": data.get(f"p{i}")}) for i, req in enumerate(reqs)]
+
+    def get_product_batch(self, reqs: list[GetProductRequest]) -> list[GetProductResponse]:
+        if not reqs:
+            return []
+        graphql_query, variables = self._get_product_batch_operation(reqs)
+        try:
+            logger.info("Executing batched product retrieval GraphQL query (%d products)", len(reqs))
+            data = self._execute_query(graphql_query, variables)
+            return self._parse_get_product_batch(reqs, data)
+
+        except Exception as e:
+            logger.error(f"Failed to get product: {str(e)}", exc_info=True)
+            raise Exception(f"Failed to get product: {str(e)}")
+
+    async def aget_product_batch(self, reqs: list[GetProductRequest]) -> list[GetProductResponse]:
+        if not reqs:
+            return []
+        graphql_query, variables = self._get_product_batch_operation(reqs)
+        try:
+            logger.info("Executing batched product retrieval GraphQL query (%d products)", len(reqs))
+            data = await self._aexecute_query(graphql_query, variables)
+            return self._parse_get_product_batch(reqs, data)
+
         except Exception as e:
             logger.error(f"Failed to get product: {str(e)}", exc_info=True)
             raise Exception(f"Failed to get product: {str(e)}")
 
 
+class CachedShopifyStoreFrontClient(CachedStoreFrontClient, ShopifyStoreFrontClient):
+    """ShopifyStoreFrontClient with TTL-cached product searches and cart reads."""
+
+
 class ShopifyAdminClient(ProductsClient):
     def __init__(self, store_url: str, access_token: str):
         self.store_url = store_url
         self.access_token = access_token
         self.headers = {
             "Content-Type": "application/json",
+            "Accept-Encoding": "br, gzip",
             "X-Shopify-Access-Token": access_token,
         }
+        # Catalog pagination issues many sequential queries; keep them on one
+        # pooled HTTP/2 connection and retry failed connection attempts
+        self._http = httpx.Client(
+            headers=self.headers,
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            transport=httpx.HTTPTransport(
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=16, max_connections=64),
+                retries=3,
+            ),
+        )
+
+    def close(self) -> None:
+        """Closes the pooled HTTP client."""
+        self._http.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
     def _execute_query(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         logger.debug("Executing GraphQL query")
-        logger.debug(f"Variables: {variables}")
-        
-        payload = {
-            "query": query,
-            "variables": variables or {}
-        }
+        logger.debug("Variables: %s", variables)
         
         try:
-            logger.info(f"Sending POST request to {self.store_url}")
-            response = requests.post(
-                self.store_url,
-                headers=self.headers,
-                json=payload,
-                timeout=30
-            )
-            logger.info(f"Received response with status code: {response.status_code}")
+            response = self._http.post(self.store_url, content=graphql_body(query, variables))
+            logger.debug("POST %s -> %s", self.store_url, response.status_code)
+            logger.debug("Response Content-Encoding: %s", response.headers.get("Content-Encoding"))
             
             response.raise_for_status()
             logger.debug("HTTP request successful")
             
-            data = response.json()
+            data = orjson.loads(response.content)
             logger.debug("Response parsed as JSON")
             
             if "errors" in data:
@@ -616,12 +1140,12 @@ class ShopifyAdminClient(ProductsClient):
                 raise Exception(f"GraphQL errors: {data['errors']}")
             
             logger.debug("GraphQL query executed successfully")
-            return data.get("data", {})
+            return data["data"]
             
-        except requests.Timeout as e:
+        except httpx.TimeoutException:
             logger.error("Request timed out after 30 seconds", exc_info=True)
             raise
-        except requests.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error occurred: {e}", exc_info=True)
             raise
         except Exception as e:
@@ -632,172 +1156,123 @@ class ShopifyAdminClient(ProductsClient):
         """
         Fetch products from Shopify Admin API with automatic pagination support.
         
+        When the whole catalog fits in num_results and spans several pages, it
+        is split into product ID ranges that are paginated concurrently.
+        Products are returned in ID order either way.
+        
         Args:
             req (GetProductsRequest): Request object containing number of products to fetch. 
         
         Returns:
             GetProductsResponse containing all requested products
         """
-        graphql_query = """
-        query getProducts($first: Int!, $after: String) {
-            products(first: $first, after: $after) {
-                edges {
-                    cursor
-                    node {
-                        id
-                        title
-                        description
-                        onlineStoreUrl
-                        images(first: 5) {
-                            edges {
-                                node {
-                                    url
-                                }
-                            }
-                        }
-                        variants(first: 10) {
-                            edges {
-                                node {
-                                    id
-                                    title
-                                    price
-                                }
-                            }
-                        }
-                        priceRangeV2 {
-                            minVariantPrice {
-                                amount
-                                currencyCode
-                            }
-                            maxVariantPrice {
-                                amount
-                                currencyCode
-                            }
-                        }
-                    }
-                }
-                pageInfo {
-                    hasNextPage
-                    endCursor
-                }
-            }
-        }
-        """
-        
-        all_products: list[Product] = []
-        remaining = req.num_results
-        after_cursor = None
+        graphql_query = admin_products_query(req.fields)
         
         logger.info(f"Starting to fetch {req.num_results} product(s) from Shopify Admin API")
         
         try:
-            while remaining > 0:
-                # Fetch up to 250 products per page (Shopify's limit)
-                page_size = min(remaining, 250)
-                
-                variables = {
-                    "first": page_size,
-                    "after": after_cursor
-                }
-                
-                logger.info(f"Fetching page with {page_size} products (cursor: {after_cursor})")
-                data = self._execute_query(graphql_query, variables)
-                logger.info("Product query executed successfully")
-                
-                products_data = data.get("products", {})
-                edges = products_data.get("edges", [])
-                page_info = products_data.get("pageInfo", {})
-                
-                logger.info(f"Retrieved {len(edges)} product(s) in this page")
-                
-                # Process products from this page
-                for idx, edge in enumerate(edges):
-                    product = edge["node"]
-                    logger.debug(f"Processing product {idx + 1}/{len(edges)}: {product.get('title')}")
-                    
-                    # Format images
-                    images = []
-                    for img_edge in product.get("images", {}).get("edges", []):
-                        images.append(img_edge["node"]["url"])
-                    product["images"] = images
-                    logger.debug(f"Formatted {len(images)} image(s)")
-                    
-                    # Format variants
-                    variants = []
-                    for var_edge in product.get("variants", {}).get("edges", []):
-                        variant_node = var_edge["node"]
-                        # Admin API returns price as string, need to format it
-                        variant_node["price"] = {
-                            "amount": variant_node["price"],
-                            "currencyCode": "USD"  # Default, will be overridden by priceRange if available
-                        }
-                        variants.append(variant_node)
-                    product["variants"] = variants
-                    logger.debug(f"Formatted {len(variants)} variant(s)")
-                    
-                    # Rename priceRangeV2 to priceRange for consistency
-                    if "priceRangeV2" in product:
-                        product["priceRange"] = product.pop("priceRangeV2")
-                    
-                    # For single variant products, simplify the structure
-                    if len(product.get("variants", [])) <= 1:
-                        price = product.get("priceRange", {}).get("minVariantPrice")
-                        if price:
-                            product["price"] = price
-                            product.pop("priceRange", None)
-                        logger.debug("Simplified price structure for single-variant product")
-                    
-                    all_products.append(Product(**product))
-                    logger.debug(f"Product {idx + 1} processed and added to list")
-                
-                remaining -= len(edges)
-                logger.info(f"Processed {len(all_products)} total products so far, {remaining} remaining")
-                
-                # Check if we need to fetch more pages
-                has_next_page = page_info.get("hasNextPage", False)
-                after_cursor = page_info.get("endCursor")
-                
-                if not has_next_page or remaining <= 0:
-                    logger.info("No more pages to fetch or target count reached")
-                    break
-                
-                if not after_cursor:
-                    logger.warning("hasNextPage is true but no endCursor provided")
-                    break
+            shards = self._id_range_shards(req.num_results) if req.num_results > 250 else []
+            if shards:
+                logger.info(f"Fetching catalog in {len(shards)} ID-range shard(s)")
+                # httpx.Client is thread-safe; the shards share its HTTP/2 connection
+                with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+                    pages = pool.map(lambda query: self._fetch_products(graphql_query, req.num_results, query), shards)
+                    all_products = [product for page in pages for product in page][:req.num_results]
+            else:
+                all_products = self._fetch_products(graphql_query, req.num_results)
             
             logger.info(f"Successfully fetched {len(all_products)} product(s)")
-            logger.info("="*60)
             return GetProductsResponse(products=all_products)
             
         except Exception as e:
             logger.error(f"Failed to get products: {str(e)}", exc_info=True)
             raise Exception(f"Failed to get products: {str(e)}")
+
+    def _id_range_shards(self, num_results: int) -> list[str]:
+        """Search filters splitting the catalog into ID ranges, or [] when it
+        is larger than num_results (the first ID range alone would then need
+        every page, so sharding would only fetch products that get dropped)."""
+        data = self._execute_query(ADMIN_PRODUCT_BOUNDS_QUERY)
+        count = data["productsCount"]["count"]
+        if count > num_results or not data["first"]["nodes"]:
+            return []
+        lo = int(data["first"]["nodes"][0]["id"].rsplit("/", 1)[1])
+        hi = int(data["last"]["nodes"][0]["id"].rsplit("/", 1)[1]) + 1
+        n = min(ADMIN_SHARD_CONCURRENCY, -(-count // 250))
+        if n <= 1:
+            return []
+        bounds = [lo + (hi - lo) * i // n for i in range(n)] + [hi]
+        return [f"id:>={a} AND id:<{b}" for a, b in zip(bounds, bounds[1:])]
+
+    def _fetch_products(self, graphql_query: str, limit: int, query: Optional[str] = None) -> list[Product]:
+        """Pages through the products matching query (all when None), up to limit."""
+        products: list[Product] = []
+        remaining = limit
+        after_cursor = None
+        
+        while remaining > 0:
+            # Fetch up to 250 products per page (Shopify's limit)
+            page_size = min(remaining, 250)
+            
+            variables = {
+                "first": page_size,
+                "after": after_cursor,
+                "query": query,
+            }
+            
+            logger.debug("Fetching page with %d products (cursor: %s)", page_size, after_cursor)
+            data = self._execute_query(graphql_query, variables)
+            
+            products_data = data["products"]
+            raw_products: list[dict[str, Any]] = products_data["nodes"]
+            page_info = products_data["pageInfo"]
+            
+            logger.info("Retrieved %d product(s) in this page", len(raw_products))
+            if not raw_products:
+                # Nothing left to validate or page past, whatever pageInfo says
+                break
+            
+            # Variant prices and the priceRangeV2 alias are handled by the models
+            products.extend(PRODUCT_LIST_ADAPTER.validate_python(raw_products))
+            remaining -= len(raw_products)
+            logger.debug("Processed %d total products so far, %d remaining", len(products), remaining)
+            
+            # Check if we need to fetch more pages
+            has_next_page = page_info["hasNextPage"]
+            after_cursor = page_info["endCursor"]
+            
+            if not has_next_page or remaining <= 0:
+                logger.info("No more pages to fetch or target count reached")
+                break
+            
+            if not after_cursor:
+                logger.warning("hasNextPage is true but no endCursor provided")
+                break
         
+        return products
+        
+
+_TOKEN_RE = re.compile(r"\w+")
 
+
+@functools.lru_cache(maxsize=1024)
 def expand_search_query(raw_query: str) -> str:
     if not raw_query:
         return raw_query
-    tokens = re.findall(r"\w+", raw_query.lower())
-    expanded = []
-    for t in tokens:
-        if t.endswith("s"):
-            singular = t[:-1]
-            expanded.append(f"{t} OR {singular}")
-        else:
-            plural = f"{t}s"
-            expanded.append(f"{t} OR {plural}")
-    inclusive_query = " OR ".join(expanded)
-    return inclusive_query
+    # Match both the singular and plural form of every token
+    return " OR ".join(
+        f"{t} OR {t[:-1]}" if t.endswith("s") else f"{t} OR {t}s"
+        for t in _TOKEN_RE.findall(raw_query.lower())
+    )
 
     
 def test_admin_client():
     load_dotenv()
-    admin_client = ShopifyAdminClient(
+    with ShopifyAdminClient(
         store_url=os.getenv("SHOPIFY_ADMIN_API_STORE_URL", ""),
         access_token=os.getenv("SHOPIFY_ADMIN_API_ACCESS_TOKEN", "")
-    )
-
-    products = admin_client.get_products(GetProductsRequest(num_results=100))
+    ) as admin_client:
+        products = admin_client.get_products(GetProductsRequest(num_results=100))
     print(products.model_dump_json(indent=2))
 
 
@@ -805,8 +1280,9 @@ def test_storefront_client():
     """
     Quick integration test demonstrating client usage.
     
-    Tests product search, cart creation, and cart retrieval in sequence.
-    Uses the default store configuration for testing purposes.
+    Tests product search, then product retrieval, cart creation and the full
+    catalog fetch concurrently (they only depend on the search), then cart
+    retrieval. Uses the default store configuration for testing purposes.
     """
     logger.info("="*60)
     logger.info("Starting Shopify client integration tests")
@@ -814,72 +1290,73 @@ def test_storefront_client():
     
     load_dotenv()
     client = ShopifyStoreFrontClient(store_url=os.getenv("SHOPIFY_STOREFRONT_STORE_URL", ""),)
+    asyncio.run(_run_storefront_checks(client))
     
+    print("\n=== Tests Complete ===")
+    logger.info("="*60)
+    logger.info("All integration tests completed")
+    logger.info("="*60)
+
+
+async def _run_storefront_checks(client: ShopifyStoreFrontClient):
     # Test 1: Search for products
     logger.info("TEST 1: Product Search")
     print("=== Product Search Test ===")
-    search_resp = client.search_products(SearchProductsRequest(query="bag", first=10))
+    search_resp = await client.asearch_products(SearchProductsRequest(query="bag", first=10))
     print(f"Found {len(search_resp.products)} products")
     logger.info(f"Product search test completed: {len(search_resp.products)} products found")
     for prod in search_resp.products:
         print(f"{prod.model_dump_json()}")
     print()
 
+    lines = []
+    for product in search_resp.products:
+        lines.append(CartLineInput(merchandiseId=product.variants[0].id, quantity=1))
+    logger.info(f"Prepared {len(lines)} line items for cart")
+
+    # Tests 1.5, 2 and 4 only need the search results, so send them together
+    # over the shared HTTP/2 connection instead of one after another
+    logger.info("TESTS 1.5, 2, 4: Product Get, Cart Creation, Get all products")
+    get_resp, cart_resp, products_resp = await asyncio.gather(
+        client.aget_product(GetProductRequest(id=search_resp.products[0].id)),
+        client.acart_create(CartCreateRequest(lines=lines)) if lines else asyncio.sleep(0),
+        client.aget_products(),
+    )
 
-    logger.info("TEST 1.5: Product Get")
     print("=== Product Get Test ===")
-    get_resp = client.get_product(GetProductRequest(id=search_resp.products[0].id))
     print("PRODUCT ===> ", get_resp.product.model_dump_json() if get_resp.product else "Not Found")
     print()
     
-    # Test 2: Create cart with first available variant
-    logger.info("TEST 2: Cart Creation")
     print("=== Cart Creation Test ===")
-    lines = []
-    for product in search_resp.products:
-        lines.append(CartLineInput(merchandiseId=product.variants[0].id, quantity=1))
-    
-    logger.info(f"Prepared {len(lines)} line items for cart")
-    
-    if lines:
-        cart_req = CartCreateRequest(lines=lines)
-        cart_resp = client.cart_create(cart_req)
-        
-        if cart_resp.user_errors or cart_resp.warnings:
-            print(f"Errors: {[e.message for e in cart_resp.user_errors]}")
-            print(f"Warnings: {[w.message for w in cart_resp.warnings]}")
-            logger.warning("Cart creation completed with errors or warnings")
-        else:
-            print(f"Cart created: {cart_resp.cart.id}") # type: ignore
-            print(f"Total: ${cart_resp.cart.cost.total_amount.amount}") # type: ignore
-            print("Cart:")
-            print(cart_resp.cart.model_dump_json()) # type: ignore
-            print()
-            logger.info("Cart creation test completed successfully")
-            
-            # Test 3: Retrieve cart
-            logger.info("TEST 3: Cart Retrieval")
-            print("=== Cart Retrieval Test ===")
-            get_resp = client.cart_get(CartGetRequest(id=cart_resp.cart.id)) # type: ignore
-            print(f"Retrieved cart with {get_resp.cart.total_quantity} items")
-            print("Cart:")
-            print(get_resp.cart.model_dump_json())
-            logger.info("Cart retrieval test completed successfully")
-    else:
+    if cart_resp is None:
         print("No products with variants found for testing")
         logger.warning("No products with variants available for cart creation test")
+    elif cart_resp.user_errors or cart_resp.warnings:
+        print(f"Errors: {[e.message for e in cart_resp.user_errors]}")
+        print(f"Warnings: {[w.message for w in cart_resp.warnings]}")
+        logger.warning("Cart creation completed with errors or warnings")
+    else:
+        print(f"Cart created: {cart_resp.cart.id}") # type: ignore
+        print(f"Total: ${cart_resp.cart.cost.total_amount.amount}") # type: ignore
+        print("Cart:")
+        print(cart_resp.cart.model_dump_json()) # type: ignore
+        print()
+        logger.info("Cart creation test completed successfully")
+        
+        # Test 3: Retrieve cart
+        logger.info("TEST 3: Cart Retrieval")
+        print("=== Cart Retrieval Test ===")
+        cart_get_resp = await client.acart_get(CartGetRequest(id=cart_resp.cart.id)) # type: ignore
+        print(f"Retrieved cart with {cart_get_resp.cart.total_quantity} items")
+        print("Cart:")
+        print(cart_get_resp.cart.model_dump_json())
+        logger.info("Cart retrieval test completed successfully")
 
-    logger.info("TEST 4: Get all products")
     print("=== Get all products test ===")
-    get_resp = client.get_products(req=GetProductsRequest(num_results=100))
-    print("PRODUCTS ===> ", get_resp.products)
+    print("PRODUCTS ===> ", products_resp.products)
     print()
-    
-    print("\n=== Tests Complete ===")
-    logger.info("="*60)
-    logger.info("All integration tests completed")
-    logger.info("="*60)
 
+    await client.aclose()
 
 if __name__ == "__main__":
     test_storefront_client()
@@ -1,36 +1,50 @@
-from typing import Any
-from fastapi import FastAPI, HTTPException
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
-from dotenv import load_dotenv
 import uuid
-from datetime import datetime
 import logging
-import sys
-import time
+import os
 
-from agent.backend.agents.orchestrator.agent import call_agent
-from agent.backend.types.types import AgentCallRequest, FunctionPayload, QueryRequest, QueryResponse
+from agent.backend._bootstrap import ensure_bootstrapped
+from agent.backend.agents.orchestrator.agent import call_agent, call_agent_collect, connect, disconnect
+from agent.backend.types.types import AgentCallRequest, AgentEvent, AgentEventType, FunctionPayload, QueryRequest, QueryResponse, QueryStreamEvent
 
 
-# Configure logging to stdout
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
+ensure_bootstrapped()
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-logger.info("Loading environment variables")
-load_dotenv()
-logger.info("Environment variables loaded")
+# Retries when the agent returns neither text nor widgets, with exponential
+# backoff between attempts
+QUERY_MAX_ATTEMPTS = 5
+QUERY_RETRY_INITIAL_DELAY = 0.25
+QUERY_RETRY_MAX_DELAY = 8.0
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info("Connecting agent runner")
+    await connect()
+    yield
+    logger.info("Disconnecting agent runner")
+    await disconnect()
+    # The tools share one storefront client; release its pooled connections.
+    # Imported here so the tools and client stay off the import path
+    from agent.backend.tools.product.tools import storefront_client
+    await storefront_client.aclose()
+    storefront_client.close()
+
 
 logger.info("Initializing FastAPI application")
 app = FastAPI(
     title="Shopping Agent API",
     description="HTTP API for the AI Shopping Assistant Agent",
     version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 logger.info("FastAPI application initialized")
 
@@ -52,85 +66,123 @@ async def query_agent(request: QueryRequest):
     Send a query to the shopping agent and get a response.
 
     Args:
-        request: QueryRequest containing the user's question, optional session_id, and chat_history
+        request: QueryRequest containing the user's question and optional session_id
 
     Returns:
-        QueryResponse with the agent's answer and updated chat history and products details
+        QueryResponse with the agent's answer and widgets
     """
-    logger.info("="*60)
-    logger.info("Query endpoint called")
-    logger.info(f"Question: {request.question}")
-    
     try:
         # Generate session ID if not provided
         session_id = request.session_id or str(uuid.uuid4())
-        logger.info(f"Session ID: {session_id}")
+        logger.debug("Query for session %s: %s", session_id, request.question)
 
-        logger.info("Calling agent with question, context, and products data")
-        while True:
-            logger.info("Invoking call_agent function")
-            agent_resp = await call_agent(
+        delay = QUERY_RETRY_INITIAL_DELAY
+        for attempt in range(1, QUERY_MAX_ATTEMPTS + 1):
+            agent_resp = await call_agent_collect(
                 req=AgentCallRequest(
                     question=request.question,
                     session_id=session_id,
                 ),
             )
 
-            if not agent_resp.answer and not agent_resp.function_payloads:
-                logger.warning("Agent returned no answer and no function payloads, retrying...")
-                time.sleep(1)  # Brief pause before retrying
-            else:
-                logger.info("Agent returned a valid response")
+            if agent_resp.answer or agent_resp.function_payloads:
                 break
-
-        logger.info("Agent response received")
-        logger.info(f"Agent answer: {agent_resp.answer if agent_resp else 'No response'}")
-        logger.info(f"Function payloads count: {len(agent_resp.function_payloads) if agent_resp.function_payloads else 0}")
-
-        logger.info("Creating widgets from function payloads")
+            if attempt == QUERY_MAX_ATTEMPTS:
+                logger.error("Agent returned no answer and no function payloads after %d attempts", attempt)
+                raise HTTPException(status_code=504, detail="Agent did not produce a response")
+            logger.warning("Agent returned no answer and no function payloads, retrying...")
+            # Yield the event loop to other requests while backing off
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, QUERY_RETRY_MAX_DELAY)
+
+        logger.debug("Agent answer: %s", agent_resp.answer)
         widgets = extract_widgets_from_function_payloads(agent_resp.function_payloads) if agent_resp else []
-        logger.info(f"Created {len(widgets)} widget(s)")
-
-        # Update session with new messages
-        current_time = datetime.now().isoformat()
-        logger.info(f"Updating session at {current_time}")
 
-        logger.info("Building query response")
         response = QueryResponse(
             response=agent_resp.answer if agent_resp else "No response generated",
             status="success",
             session_id=session_id,
             widgets=widgets,
         )
-        logger.info("Query completed successfully")
-        logger.info("="*60)
-        
-        return response
+        logger.info("Query for session %s answered with %d widget(s)", session_id, len(widgets))
+
+        # Serialize once in pydantic-core instead of letting FastAPI dump,
+        # re-validate and re-encode the widget payloads
+        return Response(content=response.model_dump_json(), media_type="application/json")
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing query: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
 
 
+@app.post("/query/stream")
+async def query_agent_stream(request: QueryRequest):
+    """
+    Send a query to the shopping agent and stream the response as server-sent events.
+
+    Args:
+        request: QueryRequest containing the user's question and optional session_id
+
+    Returns:
+        StreamingResponse emitting text deltas and widgets as the agent produces them
+    """
+    session_id = request.session_id or str(uuid.uuid4())
+    logger.info("Streaming query for session %s", session_id)
+
+    events = call_agent(
+        req=AgentCallRequest(
+            question=request.question,
+            session_id=session_id,
+        ),
+    )
+    return StreamingResponse(sse_encode(events, session_id), media_type="text/event-stream")
+
+
+async def sse_encode(events: AsyncIterator[AgentEvent], session_id: str) -> AsyncIterator[str]:
+    """Encodes agent events as server-sent events, ending with a done event."""
+    try:
+        async for event in events:
+            if event.type == AgentEventType.TEXT:
+                frame = QueryStreamEvent(type="text", text=event.text)
+            elif event.function_payload:
+                widgets = extract_widgets_from_function_payloads([event.function_payload])
+                if not widgets:
+                    continue
+                frame = QueryStreamEvent(type="widgets", widgets=widgets)
+            else:
+                continue
+            yield f"data: {frame.model_dump_json(exclude_none=True)}\n\n"
+    except Exception as e:
+        logger.error(f"Error streaming query: {str(e)}", exc_info=True)
+        frame = QueryStreamEvent(type="error", text=f"Error processing query: {str(e)}")
+        yield f"data: {frame.model_dump_json(exclude_none=True)}\n\n"
+        return
+
+    frame = QueryStreamEvent(type="done", session_id=session_id)
+    yield f"data: {frame.model_dump_json(exclude_none=True)}\n\n"
+
+
+# How each widget tool's payload is added to the response's widget list
+_WIDGET_COLLECTORS: dict[str, Callable[[list[Any], Any], None]] = {
+    "create_products_widgets": list.extend,
+    "create_cart_widget": list.append,
+    "create_products_section_widget": list.append,
+}
+
+
 def extract_widgets_from_function_payloads(function_payloads: list[FunctionPayload]):
     """Extract widgets from function payloads
     
     NOTE: This function is tied to the specific function names used in the agent tools.
     """
     widgets: list[Any] = []
-    logger.info(f"Extracting widgets from {len(function_payloads)} function payloads")
     for payload in function_payloads:
-        logger.info(f"Processing payload: {payload.name} --> {payload.payload}")
-        if payload.name == "create_products_widgets":
-            logger.info(f"Adding product widgets from payload: {payload.name} -- {len(payload.payload) if payload.payload else 0} items")
-            widgets.extend(payload.payload) # type: ignore
-        elif payload.name == "create_cart_widget":
-            logger.info(f"Adding cart widget from payload: {payload.name}")
-            widgets.append(payload.payload)
-        elif payload.name == "create_products_section_widget":
-            logger.info(f"Adding product section widget from payload: {payload.name}")
-            widgets.append(payload.payload)
-    logger.info(f"Widget extraction completed -- {len(widgets)} widget(s) extracted -- {widgets}")
+        collect = _WIDGET_COLLECTORS.get(payload.name)
+        if collect is not None:
+            collect(widgets, payload.payload)
+    logger.debug("Extracted %d widget(s) from %d function payload(s)", len(widgets), len(function_payloads))
     return widgets
 
 
@@ -139,5 +191,17 @@ if __name__ == "__main__":
     logger.info("Starting Shopping Agent API Server")
     logger.info("="*60)
     logger.info("Running server on http://0.0.0.0:8001")
-    # Run the server
-    uvicorn.run("main:app", host="0.0.0.0", port=8001, reload=True)
+    # Reload mode adds a supervisor and file watchers, so it is opt-in for
+    # development; worker processes only apply without it
+    reload = os.getenv("UVICORN_RELOAD", "0") == "1"
+    # "auto" picks uvloop and httptools (see requirements.txt), moving socket
+    # I/O and HTTP parsing out of Python, and falls back where unavailable
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8001,
+        loop="auto",
+        http="auto",
+        reload=reload,
+        workers=None if reload else int(os.getenv("UVICORN_WORKERS", "1")),
+    )
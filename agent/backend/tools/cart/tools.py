@@ -1,11 +1,11 @@
 import logging
 import os
-import sys
 from typing import Optional
 
 
 from google.adk.tools import ToolContext
 
+from agent.backend._bootstrap import ensure_bootstrapped
 from agent.backend.state import keys
 from agent.backend.client.base_types import  CartCreateRequest, CartLineInput, GetProductRequest, StoreProvider
 from agent.backend.client.factory import get_storefront_client
@@ -13,12 +13,7 @@ from agent.backend.client.interface import StoreFrontClient
 from agent.backend.types.types import Cart, Price, StateCart, StateCartProduct
 
 
-# Configure logging to stdout
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
+ensure_bootstrapped()
 logger = logging.getLogger(__name__)
 
 
@@ -32,7 +27,7 @@ storefront_client: StoreFrontClient = get_storefront_client(
 logger.info("Storefront client initialized successfully")
 
 
-def add_item_to_cart(
+async def add_item_to_cart(
     item_id: str,
     quantity: int,
     tool_context: ToolContext,
@@ -47,7 +42,7 @@ def add_item_to_cart(
     cart_product: StateCartProduct = state_cart.id_to_product.get(item_id) # type: ignore
     if cart_product is None:
         logger.info(f"Fetching product details for item ID: {item_id}")
-        resp = storefront_client.get_product(req=GetProductRequest(id=item_id))
+        resp = await storefront_client.aget_product(req=GetProductRequest(id=item_id))
         if resp.product is None:
             logger.error(f"Product with ID {item_id} not found in store")
             return
@@ -84,7 +79,7 @@ def remove_item_from_cart(
     logger.info("Item not found in cart; nothing to remove")
 
 
-def create_store_cart_and_get_checkout_url(
+async def create_store_cart_and_get_checkout_url(
     tool_context: ToolContext,
 ) -> None:
     logger.info("create_store_cart_and_get_checkout_url called")
@@ -105,7 +100,7 @@ def create_store_cart_and_get_checkout_url(
                 quantity=product.quantity,
                 merchandiseId=product.variant_id,
             ))
-            logger.debug(f"Added line item: {product.id} with variant id {product.variant_id} (qty: {product.quantity})")
+            logger.debug("Added line item: %s with variant id %s (qty: %s)", product.id, product.variant_id, product.quantity)
         logger.info(f"Created {len(lines)} cart line item(s)")
 
         if len(lines) == 0:
@@ -113,7 +108,7 @@ def create_store_cart_and_get_checkout_url(
             return
 
         logger.info("Sending cart creation request to storefront client")
-        resp = storefront_client.cart_create(req=CartCreateRequest(
+        resp = await storefront_client.acart_create(req=CartCreateRequest(
             lines=lines,
         ))
         logger.info("Cart created successfully on storefront")
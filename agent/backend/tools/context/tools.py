@@ -1,19 +1,16 @@
 import logging
-import sys
 from typing import Any
 
 from google.adk.tools import ToolContext
 
+from agent.backend._bootstrap import ensure_bootstrapped
+from agent.backend.client.base_types import SearchProductsRequest
 from agent.backend.state import keys
+from agent.backend.tools.product.tools import storefront_client
 from agent.backend.types.types import SearchCategory
 
 
-# Configure logging to stdout
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
+ensure_bootstrapped()
 logger = logging.getLogger(__name__)
 
 
@@ -30,9 +27,11 @@ def set_search_categories(raw_categories: list[dict[str, Any]], tool_context: To
         cats.append(cat)
 
     logger.info(f"Setting search categories in state: {cats}")
-    tool_context.state[keys.SEARCH_CATEGORIES_STATE_KEY] = cats
+    tool_context.state[keys.SEARCH_CATEGORIES_STATE_KEY] = [cat.model_dump() for cat in cats]
 
 
 def set_search_query(query: str, tool_context: ToolContext) -> None:
     logger.info(f"Setting search query in state: {query}")
     tool_context.state[keys.SEARCH_QUERY_STATE_KEY] = query
+    # The discovery agent's search_products issues this same request next
+    storefront_client.prefetch([SearchProductsRequest(query=query)])
@@ -1,19 +1,18 @@
 import logging
-import sys
 
 from google.adk.sessions.state import State
+from pydantic import TypeAdapter
 
+from agent.backend._bootstrap import ensure_bootstrapped
 from agent.backend.state import keys
 from agent.backend.types.types import SearchCategory
 
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
+ensure_bootstrapped()
 logger = logging.getLogger(__name__)
 
+_SEARCH_CATEGORIES_ADAPTER = TypeAdapter(list[SearchCategory])
+
 def get_search_query(state: State) -> str:
     query = state.get(keys.SEARCH_QUERY_STATE_KEY, [])
     logger.info(f"Retrieved query from state: {query}")
@@ -22,4 +21,4 @@ def get_search_query(state: State) -> str:
 def get_search_categories(state: State) -> list[SearchCategory]:
     categories = state.get(keys.SEARCH_CATEGORIES_STATE_KEY, [])
     logger.info(f"Retrieved categories from state: {categories}")
-    return categories
+    return _SEARCH_CATEGORIES_ADAPTER.validate_python(categories)
@@ -1,6 +1,7 @@
 import logging
-import sys
 from google.adk.tools import ToolContext
+from pydantic import TypeAdapter
+from agent.backend._bootstrap import ensure_bootstrapped
 from agent.backend.state import keys
 from agent.backend.types.types import (
     Cart,
@@ -13,16 +14,17 @@ from agent.backend.types.types import (
     WidgetType,
 )
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.StreamHandler(sys.stdout)],
-)
+ensure_bootstrapped()
 logger = logging.getLogger(__name__)
 
+# Validate lists from the model or session state in a single pydantic-core call
+_PRODUCT_LIST_ADAPTER = TypeAdapter(list[Product])
+_PRODUCT_SECTIONS_ADAPTER = TypeAdapter(list[ProductSection])
+
 
 def create_products_section_widget(tool_context: ToolContext) -> Widget:
-    sections: list[ProductSection] = tool_context.state.get(keys.PRODUCT_SECTIONS_STATE_KEY, [])
+    raw_sections = tool_context.state.get(keys.PRODUCT_SECTIONS_STATE_KEY, [])
+    sections = _PRODUCT_SECTIONS_ADAPTER.validate_python(raw_sections)
     if len(sections) == 0:
         logger.error("No product sections found in state")
         return Widget(
@@ -31,34 +33,37 @@ def create_products_section_widget(tool_context: ToolContext) -> Widget:
             raw_html_string="<p>No product sections available.</p>"
         )
 
-    sections_widget_html = ""
+    html_parts: list[str] = []
     for sec in sections:
-        sections_widget_html += f"<h2>{sec.title or "EMPTY"}</h2>\n"
-        sections_widget_html += f"<h3>{sec.subtitle or "EMPTY"}</h3>\n"
-        sections_widget_html += f"<p>{sec.description or "EMPTY"}</p>\n"
-        sections_widget_html += "<div class='product-section'>\n"
-        raw_products = [prod.model_dump() for prod in sec.products]
-        prods_widgets = create_products_widgets(raw_products, tool_context)
+        html_parts.append(f"<h2>{sec.title or "EMPTY"}</h2>\n")
+        html_parts.append(f"<h3>{sec.subtitle or "EMPTY"}</h3>\n")
+        html_parts.append(f"<p>{sec.description or "EMPTY"}</p>\n")
+        html_parts.append("<div class='product-section'>\n")
+        # The section already holds validated products; no dump/re-validate
+        prods_widgets = _products_widgets(sec.products)
         for pw in prods_widgets:
-            sections_widget_html += pw.raw_html_string + "\n"
-        sections_widget_html += "</div>\n"
+            html_parts.append(pw.raw_html_string + "\n")
+        html_parts.append("</div>\n")
 
     return Widget(
         type=WidgetType.PRODUCT_SECTIONS,
         data={
             "sections": [sec.model_dump() for sec in sections]
         },
-        raw_html_string=sections_widget_html
+        raw_html_string="".join(html_parts)
     )
 
 
 def create_products_widgets(raw_prod_list: list[dict], tool_context: ToolContext) -> list[Widget]:
-    prod_list = [Product(**prod) for prod in raw_prod_list]
+    return _products_widgets(_PRODUCT_LIST_ADAPTER.validate_python(raw_prod_list))
+
+
+def _products_widgets(prod_list: list[Product]) -> list[Widget]:
     ws = []
-    product_cards_html = ""
+    product_cards_html: list[str] = []
 
     for prod in prod_list:
-        logger.debug(f"Creating product widget for: {prod.title}")
+        logger.debug("Creating product widget for: %s", prod.title)
         card_html = f"""
         <div class="w-full bg-white rounded-2xl overflow-hidden border border-gray-100 transition-all duration-300 flex flex-col h-full">
             <img 
@@ -103,11 +108,11 @@ def create_products_widgets(raw_prod_list: list[dict], tool_context: ToolContext
             },
             raw_html_string=card_html,
         ))
-        product_cards_html += f"<div class='w-[30%]'>{card_html}</div>\n"
+        product_cards_html.append(f"<div class='w-[30%]'>{card_html}</div>\n")
 
     container_html = f"""
     <div class="bg-white flex flex-wrap justify-start gap-6 w-full p-8 rounded-3xl">
-        {product_cards_html}
+        {"".join(product_cards_html)}
     </div>
     """
 
@@ -137,9 +142,9 @@ def create_cart_widget(tool_context: ToolContext) -> Widget:
     total = store_cart.total_amount  # type: ignore
     checkout_url = store_cart.checkout_url  # type: ignore
 
-    cart_products_html = ""
+    cart_products_html: list[str] = []
     for product in state_cart.id_to_product.values():
-        cart_products_html += f"""
+        cart_products_html.append(f"""
         <div class="flex justify-between items-center border-b border-gray-100 py-3">
             <div>
                 <h4 class="text-black text-[15px] font-medium">{product.title}</h4>
@@ -149,7 +154,7 @@ def create_cart_widget(tool_context: ToolContext) -> Widget:
                 {formatPrice(product.price.amount * product.quantity, product.price.currency_code)}
             </p>
         </div>
-        """
+        """)
 
     html_string = f"""
     <div class="bg-white w-full max-w-2xl mx-auto rounded-2xl">
@@ -159,7 +164,7 @@ def create_cart_widget(tool_context: ToolContext) -> Widget:
         </div>
 
         <div class="divide-y divide-gray-100 mb-6">
-            {cart_products_html}
+            {"".join(cart_products_html)}
         </div>
 
         <div class="space-y-2 border-t border-gray-200 pt-4">
@@ -1,24 +1,19 @@
 import logging
 import os
-import sys
 from typing import Optional
 
 from google.adk.tools import ToolContext
 
+from agent.backend._bootstrap import ensure_bootstrapped
 from agent.backend.client.base_types import GetProductRequest, StoreProvider
-from agent.backend.tools.product.utils import _search_products
+from agent.backend.tools.product.utils import _ProductBatcher, _asearch_products
 from agent.backend.client.factory import get_storefront_client
 from agent.backend.client.interface import StoreFrontClient
 from agent.backend.state import keys
 from agent.backend.tools.context.utils import get_search_categories, get_search_query
 from agent.backend.types.types import Price, Product, ProductList, ProductSection
 
-# Configure logging to stdout
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
+ensure_bootstrapped()
 logger = logging.getLogger(__name__)
 
 
@@ -31,14 +26,16 @@ storefront_client: StoreFrontClient = get_storefront_client(
 )
 logger.info("Storefront client initialized successfully")
 
+# Product lookups from the same model turn share one storefront request
+product_batcher = _ProductBatcher(storefront_client)
+
 
-def search_product_categories(tool_context: ToolContext) -> None:
+async def search_product_categories(tool_context: ToolContext) -> None:
     categories = get_search_categories(tool_context.state)
 
     sections: list[ProductSection] = []
     for cat in categories:
-        query = cat.query
-        prod_list = _search_products(query, storefront_client)
+        prod_list = await _asearch_products(cat.query, storefront_client)
         sections.append(ProductSection(
             title=cat.title,
             description=cat.description,
@@ -46,17 +43,21 @@ def search_product_categories(tool_context: ToolContext) -> None:
             products=prod_list.products,
         ))
 
-    logger.info(f"Setting product categories sections in state: {sections}")
-    tool_context.state[keys.PRODUCT_SECTIONS_STATE_KEY] = sections
+    logger.info("Setting %d product category section(s) in state", len(sections))
+    tool_context.state[keys.PRODUCT_SECTIONS_STATE_KEY] = [sec.model_dump() for sec in sections]
 
 
-def search_products(tool_context: ToolContext) -> ProductList:
-    query = get_search_query(tool_context.state)
+async def search_products(tool_context: ToolContext, query: str = "") -> ProductList:
+    # An explicit query lets the discovery agent search in the same turn;
+    # otherwise fall back to the query gathered by the context agent
+    query = query or get_search_query(tool_context.state)
 
-    logger.info(f"search_products called with query: '{query}'")
+    logger.info("search_products called with query: %r", query)
     
     try:
-        prod_list = _search_products(query, storefront_client) 
+        # Async storefront calls let ADK overlap tool calls that the model
+        # issues in the same turn
+        prod_list = await _asearch_products(query, storefront_client)
         return prod_list
     
     except Exception as e:
@@ -64,19 +65,16 @@ def search_products(tool_context: ToolContext) -> ProductList:
         return ProductList()
 
 
-def get_product_details(product_id: str, tool_context: Optional[ToolContext] = None) -> Optional[Product]:
-    logger.info(f"get_product_details called with product_id: '{product_id}'")
+async def get_product_details(product_id: str, tool_context: Optional[ToolContext] = None) -> Optional[Product]:
+    logger.info("get_product_details called with product_id: %r", product_id)
     
     try:
-        logger.info("Sending get product request to storefront client")
-        resp = storefront_client.get_product(GetProductRequest(id=product_id))
+        resp = await product_batcher.get(GetProductRequest(id=product_id))
         
         if resp.product is None:
-            logger.info(f"Product not found: {product_id}")
+            logger.info("Product not found: %s", product_id)
             return None
         
-        logger.info(f"Received product: {resp.product.title}")
-        
         # Convert the client Product type to the tool Product type
         # Take the first variant as the primary product representation
         if not resp.product.variants:
@@ -96,7 +94,7 @@ def get_product_details(product_id: str, tool_context: Optional[ToolContext] = N
             ),
         )
         
-        logger.info(f"Successfully retrieved product: {product.title}")
+        logger.debug("Retrieved product: %s", product.title)
         return product
     
     except Exception as e:
@@ -1,48 +1,103 @@
+import asyncio
 import logging
-import sys
-from agent.backend.client.base_types import SearchProductsRequest
+from agent.backend._bootstrap import ensure_bootstrapped
+from agent.backend.client.base_types import GetProductRequest, GetProductResponse, SearchProductsRequest, SearchProductsResponse
 from agent.backend.client.interface import StoreFrontClient
 from agent.backend.types.types import Price, Product, ProductList
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
+ensure_bootstrapped()
 logger = logging.getLogger(__name__)
 
 
-def _search_products(query: str, client: StoreFrontClient) -> ProductList:
-    logger.info(f"_search_products called with query: '{query}'")
-    
+async def _asearch_products(query: str, client: StoreFrontClient) -> ProductList:
+    logger.info("_asearch_products called with query: %r", query)
+
     try:
-        logger.info("Sending search request to storefront client")
-        resp = client.search_products(SearchProductsRequest(query=query))
-        logger.info(f"Received response with {len(resp.products)} products")
-
-        prod_list = ProductList()
-        logger.info("Processing products and variants")
-        
-        for idx, prod in enumerate(resp.products):
-            logger.debug(f"Processing product {idx + 1}/{len(resp.products)}: {prod.title}")
-            for variant_idx, variant in enumerate(prod.variants):
-                product = Product(
-                    id=prod.id,
-                    variant_id=prod.variants[0].id if prod.variants else "",
-                    title=f"{prod.title} - {variant.title}",
-                    description=prod.description,
-                    image=prod.images[0],
-                    price=Price(
-                        amount=variant.price.amount,
-                        currency_code=variant.price.currency_code,
-                    ),
-                )
-                prod_list.products.append(product)
-                logger.debug(f"Added variant {variant_idx + 1}: {product.title} - {product.price.amount} {product.price.currency_code}")
-
-        logger.info(f"Successfully processed {len(prod_list.products)} product variants")
-        return prod_list
-    
+        resp = await client.asearch_products(SearchProductsRequest(query=query))
+        return _to_product_list(resp)
+
     except Exception as e:
-        logger.error(f"Error in _search_products: {str(e)}", exc_info=True)
+        logger.error(f"Error in _asearch_products: {str(e)}", exc_info=True)
         return ProductList()
+
+
+class _ProductBatcher:
+    """Coalesces product lookups issued in the same event-loop tick.
+
+    ADK runs the function calls of one model turn concurrently, so several
+    get_product_details calls arrive together; they are sent to the
+    storefront as one aget_product_batch request instead of one each. If
+    that request fails, each lookup is retried on its own.
+    """
+
+    def __init__(self, client: StoreFrontClient):
+        self._client = client
+        self._pending: list[tuple[GetProductRequest, asyncio.Future]] = []
+        # Strong references so in-flight flushes aren't garbage collected
+        self._tasks: set[asyncio.Task] = set()
+
+    async def get(self, req: GetProductRequest) -> GetProductResponse:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((req, fut))
+        if len(self._pending) == 1:
+            # Runs after every task already scheduled for this tick has queued
+            loop.call_soon(self._flush)
+        return await fut
+
+    def _flush(self) -> None:
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: list[tuple[GetProductRequest, asyncio.Future]]) -> None:
+        if len(batch) == 1:
+            await self._send_one(*batch[0])
+            return
+        try:
+            resps = await self._client.aget_product_batch([req for req, _ in batch])
+        except Exception as e:
+            # One bad id fails the whole batched request; look each product up
+            # on its own so the error only reaches the caller that caused it
+            logger.warning("Batched lookup of %d product(s) failed, retrying individually: %s", len(batch), e)
+            await asyncio.gather(*(self._send_one(req, fut) for req, fut in batch))
+            return
+        for (_, fut), resp in zip(batch, resps):
+            if not fut.done():
+                fut.set_result(resp)
+
+    async def _send_one(self, req: GetProductRequest, fut: asyncio.Future) -> None:
+        try:
+            resp = await self._client.aget_product(req)
+        except Exception as e:
+            if not fut.done():
+                fut.set_exception(e)
+            return
+        if not fut.done():
+            fut.set_result(resp)
+
+
+def _to_product_list(resp: SearchProductsResponse) -> ProductList:
+
+    prod_list = ProductList()
+    
+    # The client models were validated when the response was parsed, so
+    # these copies can skip validation
+    for prod in resp.products:
+        for variant in prod.variants:
+            product = Product.model_construct(
+                id=prod.id,
+                variant_id=prod.variants[0].id if prod.variants else "",
+                title=f"{prod.title} - {variant.title}",
+                description=prod.description,
+                image=prod.images[0],
+                price=Price.model_construct(
+                    amount=variant.price.amount,
+                    currency_code=variant.price.currency_code,
+                ),
+            )
+            prod_list.products.append(product)
+
+    logger.debug("Converted %d product(s) into %d variant(s)", len(resp.products), len(prod_list.products))
+    return prod_list
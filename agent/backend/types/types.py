@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Any, Optional
+from typing import Any, Literal, Optional
 from enum import Enum
 
 
@@ -35,11 +35,40 @@ class Cart(BaseModel):
     total_amount: Price
 
 
+class Widget(BaseModel):
+    type: str
+    data: Any
+    raw_html_string: str
+
+
 class FunctionPayload(BaseModel):
     name: str
     payload: Any | None = None
 
 
+class ProductsWidgetsPayload(FunctionPayload):
+    name: Literal["create_products_widgets"] = "create_products_widgets"
+    payload: list[Widget] = Field(default_factory=list)
+
+
+class CartWidgetPayload(FunctionPayload):
+    name: Literal["create_cart_widget"] = "create_cart_widget"
+    payload: Widget
+
+
+class ProductsSectionWidgetPayload(FunctionPayload):
+    name: Literal["create_products_section_widget"] = "create_products_section_widget"
+    payload: Widget
+
+
+# Concrete payload type per tool name; other tools use the untyped FunctionPayload
+FUNCTION_PAYLOAD_TYPES: dict[str, type[FunctionPayload]] = {
+    "create_products_widgets": ProductsWidgetsPayload,
+    "create_cart_widget": CartWidgetPayload,
+    "create_products_section_widget": ProductsSectionWidgetPayload,
+}
+
+
 class AgentCallRequest(BaseModel):
     question: str
     session_id: str | None = None
@@ -50,23 +79,37 @@ class AgentCallResponse(BaseModel):
     function_payloads: list[FunctionPayload] = Field(default_factory=list)
 
 
+class AgentEventType(str, Enum):
+    TEXT = "TEXT"
+    FUNCTION_CALL = "FUNCTION_CALL"
+    FUNCTION_PAYLOAD = "FUNCTION_PAYLOAD"
+
+
+class AgentEvent(BaseModel):
+    type: AgentEventType
+    text: str | None = None
+    function_name: str | None = None
+    function_payload: FunctionPayload | None = None
+
+
 class QueryRequest(BaseModel):
     question: str
     session_id: Optional[str] = None
 
 
-class Widget(BaseModel):
-    type: str
-    data: Any
-    raw_html_string: str
-
-
 class QueryResponse(BaseModel):
     response: str
     status: str
     session_id: Optional[str] = None
     widgets: list[Any] = Field(default_factory=list)
 
+
+class QueryStreamEvent(BaseModel):
+    type: Literal["text", "widgets", "error", "done"]
+    text: Optional[str] = None
+    widgets: Optional[list[Any]] = None
+    session_id: Optional[str] = None
+
 class WidgetType(str, Enum):
     PRODUCT = "PRODUCT"
     CART = "CART"
@@ -80,6 +123,7 @@ class ProductWidget(Widget):
 class CartWidget(Widget):
     pass
 
+
 class SearchCategory(BaseModel):
     title: str
     subtitle: str
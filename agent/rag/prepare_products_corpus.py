@@ -1,3 +1,4 @@
+import asyncio
 import os
 import tempfile
 from dotenv import load_dotenv
@@ -74,8 +75,10 @@ def main():
             "Missing env: GOOGLE_CLOUD_PROJECT, GOOGLE_CLOUD_LOCATION, SHOPIFY_STOREFRONT_URL"
         )
 
-    client = get_storefront_client(StoreProvider.SHOPIFY, store_url=STORE_URL)
-    products = client.get_products()
+    # Closing releases the client's pooled connections once the catalog is in
+    with get_storefront_client(StoreProvider.SHOPIFY, store_url=STORE_URL) as client:
+        # Product-type shards are fetched concurrently
+        products = asyncio.run(client.aget_products())
     combined_text = to_rag_docs(products)
 
     init_vertex()